@@ -0,0 +1,8 @@
+# Load tests and benchmarks for the backend. Run from manyar-backend/:
+#
+#   python -m benchmarks.generate --scale 100k      build a synthetic catalog
+#   python -m benchmarks.run --scale 100k           benchmark every endpoint
+#   python -m benchmarks.compare OLD.json NEW.json  compare two runs
+#
+# Each scale gets its own SQLite database (instance/bench-<scale>.db) unless
+# --database is given, so benchmarks never touch the real data.
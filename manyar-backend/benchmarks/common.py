@@ -0,0 +1,29 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Rows per table at each scale
+SCALES = {
+    '1k': {'categories': 10, 'products': 1_000, 'messages': 200},
+    '100k': {'categories': 50, 'products': 100_000, 'messages': 20_000},
+    '1m': {'categories': 200, 'products': 1_000_000, 'messages': 200_000},
+}
+
+ADMIN_USERNAME = 'bench'
+ADMIN_PASSWORD = 'bench-password'
+
+def default_database(scale):
+    # Relative SQLite paths resolve to the app's instance folder
+    return f'sqlite:///bench-{scale}.db'
+
+def load_app(database):
+    # DATABASE_URL is read when src.main creates the app on import, so it
+    # has to be set first
+    os.environ['DATABASE_URL'] = database
+    # Benchmarks send far more contact messages than the limits allow
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    from src.main import app
+    return app
@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+
+# Compares two result files from benchmarks.run, endpoint by endpoint, and
+# exits with status 1 when a p95 latency or the SQL statement count got
+# worse by more than --threshold percent.
+
+METRICS = [
+    ('throughput_rps', lambda r: r['throughput_rps'], False),
+    ('p50_ms', lambda r: r['latency_ms']['p50'], True),
+    ('p95_ms', lambda r: r['latency_ms']['p95'], True),
+    ('p99_ms', lambda r: r['latency_ms']['p99'], True),
+    ('sql', lambda r: r['sql_per_request'], True),
+]
+GATED = {'p95_ms', 'sql'}
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed regression in percent')
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f'{old.get("commit")} -> {new.get("commit")} ({new.get("scale")}, {new.get("target")})')
+    regressions = []
+    for name, new_result in new['results'].items():
+        old_result = old['results'].get(name)
+        if old_result is None:
+            print(f'{name:<20} new endpoint')
+            continue
+
+        columns = []
+        for metric, value, lower_is_better in METRICS:
+            before, after = value(old_result), value(new_result)
+            delta = change(before, after)
+            columns.append(f'{metric} {before} -> {after}' + (f' ({delta:+.1f}%)' if delta is not None else ''))
+            if metric in GATED and delta is not None:
+                worse = delta if lower_is_better else -delta
+                if worse > args.threshold:
+                    regressions.append(f'{name} {metric} {delta:+.1f}%')
+        print(f'{name:<20} ' + '  '.join(columns))
+
+    if regressions:
+        print('Regressions: ' + ', '.join(regressions))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import SCALES, ADMIN_USERNAME, ADMIN_PASSWORD, default_database, load_app
+
+# Synthetic catalog generator. Fills category, product, product_image and
+# contact_message with bilingual text at one of the SCALES, in batched
+# transactions through the same bulk paths as the catalog import, so the
+# search index and the dashboard counters stay consistent. The output only
+# depends on --seed.
+
+BATCH_SIZE = 5000
+HISTORY_DAYS = 365
+
+WORDS_EN = [
+    'laptop', 'desktop', 'monitor', 'printer', 'keyboard', 'mouse', 'router', 'cable',
+    'charger', 'battery', 'screen', 'memory', 'storage', 'drive', 'gaming', 'office',
+    'wireless', 'portable', 'compact', 'original', 'used', 'new', 'repair', 'service',
+    'notebook', 'paper', 'ink', 'toner', 'binding', 'thesis', 'research', 'copy',
+    'cream', 'shampoo', 'perfume', 'serum', 'lotion', 'soap', 'oil', 'care',
+]
+WORDS_AR = [
+    'حاسوب', 'محمول', 'شاشة', 'طابعة', 'لوحة', 'مفاتيح', 'فأرة', 'راوتر', 'كابل',
+    'شاحن', 'بطارية', 'ذاكرة', 'تخزين', 'قرص', 'ألعاب', 'مكتب', 'لاسلكي', 'أصلي',
+    'مستعمل', 'جديد', 'صيانة', 'خدمة', 'دفتر', 'ورق', 'حبر', 'تجليد', 'أطروحة',
+    'بحث', 'تصوير', 'كريم', 'شامبو', 'عطر', 'سيروم', 'مرطب', 'صابون', 'زيت', 'عناية',
+]
+ICONS = ['wrench', 'computer', 'printer', 'sparkles']
+
+def words(rng, vocabulary, count):
+    return ' '.join(rng.choice(vocabulary) for _ in range(count))
+
+def random_time(rng, now):
+    return now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 24 * 3600))
+
+def category_row(rng, i):
+    return {
+        'name_ar': f'{words(rng, WORDS_AR, 2)} {i}',
+        'name_en': f'{words(rng, WORDS_EN, 2).title()} {i}',
+        'description_ar': words(rng, WORDS_AR, 12),
+        'description_en': words(rng, WORDS_EN, 12),
+        'icon': rng.choice(ICONS),
+        'whatsapp_link': 'https://wa.me/963900000000',
+        'phone_number': '+963900000000',
+    }
+
+def product_row(rng, category_ids, now):
+    price = round(rng.uniform(1, 2000), 2)
+    created_at = random_time(rng, now)
+    return {
+        'name_ar': words(rng, WORDS_AR, rng.randint(2, 5)),
+        'name_en': words(rng, WORDS_EN, rng.randint(2, 5)).title(),
+        'description_ar': words(rng, WORDS_AR, rng.randint(10, 60)),
+        'description_en': words(rng, WORDS_EN, rng.randint(10, 60)),
+        'price': price,
+        'original_price': round(price * rng.uniform(1.05, 1.6), 2) if rng.random() < 0.3 else None,
+        'image_url': None,
+        'is_featured': rng.random() < 0.05,
+        'is_active': rng.random() < 0.9,
+        'stock_quantity': rng.randint(0, 100),
+        'phone_number': None,
+        'category_id': rng.choice(category_ids),
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+def image_rows(rng, product_id, created_at):
+    return [
+        {
+            'product_id': product_id,
+            'image_url': f'/uploads/bench-{product_id}-{i}.jpg',
+            'alt_text': None,
+            'is_primary': i == 0,
+            'sort_order': i,
+            'created_at': created_at,
+        }
+        for i in range(rng.choice([0, 1, 2, 2, 3]))
+    ]
+
+def message_row(rng, i, now):
+    return {
+        'name': f'Customer {i}',
+        'email': f'customer{i}@example.com',
+        'message': words(rng, WORDS_AR if rng.random() < 0.5 else WORDS_EN, rng.randint(5, 40)),
+        'is_read': rng.random() < 0.7,
+        'created_at': random_time(rng, now),
+    }
+
+def insert_products(rng, count, category_ids, now, report):
+    from src.models.product import Product, db
+    from src.models.product_image import ProductImage
+    from src.search import document, index_documents
+
+    done = 0
+    while done < count:
+        rows = [product_row(rng, category_ids, now) for _ in range(min(BATCH_SIZE, count - done))]
+        product_ids = db.session.execute(
+            db.insert(Product).returning(Product.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+        images = [
+            image
+            for product_id, row in zip(product_ids, rows)
+            for image in image_rows(rng, product_id, row['created_at'])
+        ]
+        if images:
+            db.session.execute(db.insert(ProductImage), images)
+
+        index_documents([
+            document(product_id, row['name_ar'], row['name_en'], row['description_ar'], row['description_en'])
+            for product_id, row in zip(product_ids, rows)
+        ])
+        db.session.commit()
+
+        done += len(rows)
+        report('products', done, count)
+
+def insert_messages(rng, count, now, report):
+    from src.models.product import ContactMessage, db
+
+    done = 0
+    while done < count:
+        rows = [message_row(rng, done + i, now) for i in range(min(BATCH_SIZE, count - done))]
+        db.session.execute(db.insert(ContactMessage), rows)
+        db.session.commit()
+        done += len(rows)
+        report('messages', done, count)
+
+def ensure_admin():
+    from werkzeug.security import generate_password_hash
+    from src.models.product import Admin, db
+
+    if Admin.query.filter_by(username=ADMIN_USERNAME).first() is None:
+        db.session.add(Admin(
+            username=ADMIN_USERNAME,
+            email=f'{ADMIN_USERNAME}@example.com',
+            password_hash=generate_password_hash(ADMIN_PASSWORD),
+            is_active=True
+        ))
+        db.session.commit()
+
+def generate(scale, seed=0, quiet=False):
+    # Expects a migrated database (see init_database in src/commands.py)
+    from src.models.product import Category, db
+
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    started = time.perf_counter()
+
+    def report(table, done, total):
+        if not quiet:
+            print(f'\r{table}: {done}/{total} ({time.perf_counter() - started:.1f}s)', end='', flush=True)
+            if done == total:
+                print()
+
+    ensure_admin()
+
+    existing = db.session.execute(db.select(db.func.count()).select_from(Category)).scalar()
+    extra = [category_row(rng, i) for i in range(existing, sizes['categories'])]
+    if extra:
+        db.session.execute(db.insert(Category), extra)
+        db.session.commit()
+    category_ids = db.session.scalars(db.select(Category.id)).all()
+
+    insert_products(rng, sizes['products'], category_ids, now, report)
+    insert_messages(rng, sizes['messages'], now, report)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill a benchmark database with a synthetic catalog.')
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--database', help='SQLAlchemy URL (default: instance/bench-<scale>.db)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = load_app(args.database or default_database(args.scale))
+    with app.app_context():
+        from src.commands import init_database
+        from src.models.product import Product, db
+
+        init_database()
+        if db.session.execute(db.select(Product.id).limit(1)).first() is not None:
+            parser.error(f'{app.config["SQLALCHEMY_DATABASE_URI"]} already has products; remove it first')
+        elapsed = generate(args.scale, seed=args.seed)
+    print(f'Generated the {args.scale} catalog in {elapsed:.1f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from benchmarks.common import SCALES, ADMIN_USERNAME, ADMIN_PASSWORD, default_database, load_app
+from benchmarks.generate import WORDS_AR, WORDS_EN
+
+# Benchmark driver. Runs every public and admin endpoint through the Flask
+# test client (default) or against a running server (--url), and records
+# per endpoint: throughput, p50 / p95 / p99 latency, SQL statements per
+# request (test client only) and peak RSS. Results are written as JSON
+# under benchmarks/results/ for benchmarks.compare.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+def endpoints(sample):
+    # (name, method, path factory, needs login, body factory)
+    rng = random.Random(1)
+    product_ids, category_ids = sample['product_ids'], sample['category_ids']
+    return [
+        ('categories', 'GET', lambda: '/api/categories', False, None),
+        ('category', 'GET', lambda: f'/api/categories/{rng.choice(category_ids)}', False, None),
+        ('products', 'GET', lambda: '/api/products', False, None),
+        ('products_page', 'GET', lambda: f'/api/products?page={rng.randint(1, 50)}', False, None),
+        ('products_category', 'GET', lambda: f'/api/products?category_id={rng.choice(category_ids)}', False, None),
+        ('products_cursor', 'GET', lambda: '/api/products?cursor=&per_page=50', False, None),
+        ('products_fields', 'GET', lambda: '/api/products?fields=name,price,image_url&lang=ar', False, None),
+        ('products_discount', 'GET', lambda: f'/api/products?category_id={rng.choice(category_ids)}&sort=discount', False, None),
+        ('products_price', 'GET', lambda: f'/api/products?min_price={rng.randint(0, 500)}&max_price=1500&in_stock=true&sort=price', False, None),
+        ('product', 'GET', lambda: f'/api/products/{rng.choice(product_ids)}', False, None),
+        ('search_en', 'GET', lambda: f'/api/products/search?q={rng.choice(WORDS_EN)}', False, None),
+        ('search_ar', 'GET', lambda: '/api/products/search?q=' + urllib.request.quote(rng.choice(WORDS_AR)), False, None),
+        ('storefront', 'GET', lambda: f'/api/storefront/{rng.choice(category_ids)}', False, None),
+        ('stats', 'GET', lambda: '/api/stats', False, None),
+        ('changes', 'GET', lambda: '/api/changes?since=0&limit=100', False, None),
+        ('contact_create', 'POST', lambda: '/api/contact', False,
+         lambda: {'name': 'Bench', 'email': 'bench@example.com', 'message': ' '.join(rng.sample(WORDS_EN, 8))}),
+        ('contact_list', 'GET', lambda: '/api/contact', True, None),
+        ('dashboard', 'GET', lambda: '/api/admin/dashboard', True, None),
+        ('admins', 'GET', lambda: '/api/admins', True, None),
+    ]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+def peak_rss_kb(pids):
+    # VmHWM of the given server processes, or ru_maxrss of this process
+    if not pids:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peak = max(peak, int(line.split()[1]))
+        except FileNotFoundError:
+            continue
+    return peak
+
+class TestClientTarget:
+    def __init__(self, app, cold):
+        from src.models.user import db
+        from sqlalchemy import event
+
+        self.app = app
+        self.cold = cold
+        self._local = threading.local()
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count_statement)
+
+    def _count_statement(self, *args):
+        self._local.statements = getattr(self._local, 'statements', 0) + 1
+
+    def client(self, login):
+        client = self.app.test_client()
+        if login:
+            client.post('/api/auth/login', json={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+        return client
+
+    def request(self, client, method, path, body):
+        from src.cache import invalidate_catalog
+
+        if self.cold:
+            invalidate_catalog()
+        self._local.statements = 0
+        response = client.open(path, method=method, json=body)
+        return response.status_code, self._local.statements
+
+class ServerTarget:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def client(self, login):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        if login:
+            self._send(opener, 'POST', '/api/auth/login', {'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+        return opener
+
+    def _send(self, opener, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method)
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with opener.open(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def request(self, client, method, path, body):
+        return self._send(client, method, path, body), None
+
+def run_endpoint(target, endpoint, requests, warmup, concurrency, server_pids):
+    name, method, path, login, body = endpoint
+    clients = [target.client(login) for _ in range(concurrency)]
+    latencies, statements, errors = [], [], 0
+    lock = threading.Lock()
+
+    for _ in range(warmup):
+        target.request(clients[0], method, path(), body() if body else None)
+
+    def worker(worker_index, count):
+        nonlocal errors
+        client = clients[worker_index]
+        for _ in range(count):
+            request_path, request_body = path(), body() if body else None
+            started = time.perf_counter()
+            status, statement_count = target.request(client, method, request_path, request_body)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if statement_count is not None:
+                    statements.append(statement_count)
+                if status >= 400:
+                    errors += 1
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency), shares))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+            'p50': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+            'p95': round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+            'p99': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        },
+        'sql_per_request': round(sum(statements) / len(statements), 2) if statements else None,
+        'peak_rss_kb': peak_rss_kb(server_pids),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_sample(app):
+    from src.models.product import Category, Product, db
+
+    with app.app_context():
+        return {
+            'product_ids': db.session.scalars(
+                db.select(Product.id).filter_by(is_active=True).order_by(db.func.random()).limit(1000)
+            ).all(),
+            'category_ids': db.session.scalars(db.select(Category.id)).all(),
+            'counts': {
+                table.__tablename__: db.session.execute(db.select(db.func.count()).select_from(table)).scalar()
+                for table in (Category, Product)
+            },
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the backend endpoints.')
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--database', help='SQLAlchemy URL (default: instance/bench-<scale>.db)')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--server-pid', type=int, action='append', default=[],
+                        help='server process to read peak RSS from (repeat for each worker)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--cold', action='store_true', help='clear the response cache before every request')
+    parser.add_argument('--only', help='comma separated endpoint names')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<time>-<commit>.json)')
+    args = parser.parse_args()
+
+    app = load_app(args.database or default_database(args.scale))
+    sample = load_sample(app)
+    if not sample['product_ids']:
+        parser.error('The database has no products; run benchmarks.generate first')
+
+    target = ServerTarget(args.url) if args.url else TestClientTarget(app, args.cold)
+    selected = set(args.only.split(',')) if args.only else None
+
+    results = {}
+    for endpoint in endpoints(sample):
+        if selected and endpoint[0] not in selected:
+            continue
+        result = run_endpoint(target, endpoint, args.requests, args.warmup, args.concurrency, args.server_pid)
+        results[endpoint[0]] = result
+        print(
+            f'{endpoint[0]:<20} {result["throughput_rps"]:>9} req/s  '
+            f'p50 {result["latency_ms"]["p50"]:>8} ms  p95 {result["latency_ms"]["p95"]:>8} ms  '
+            f'p99 {result["latency_ms"]["p99"]:>8} ms  sql {result["sql_per_request"]}  errors {result["errors"]}'
+        )
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'target': args.url or 'test-client',
+        'database': app.config['SQLALCHEMY_DATABASE_URI'],
+        'scale': args.scale,
+        'rows': sample['counts'],
+        'settings': {
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'cold': args.cold,
+        },
+        'results': results,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f'{datetime.utcnow():%Y%m%d-%H%M%S}-{commit or "unknown"}.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+
+# Production server for the backend:
+#
+#   flask --app src.main init-db          once, and after every upgrade
+#   gunicorn -c gunicorn.conf.py src.main:app
+#   gunicorn -c gunicorn_events.conf.py src.main:app   admin event streams
+#
+# The app is imported once in the master and the workers are forked from
+# it. Each worker serves requests on a pool of threads and is replaced
+# after MAX_REQUESTS requests. `kill -HUP <master pid>` starts a fresh set
+# of workers and lets the old ones finish their in-flight requests within
+# GRACEFUL_TIMEOUT; because the app is preloaded, new code needs a full
+# restart (or `kill -USR2` for a binary upgrade).
+#
+# Environment:
+#   BIND                 default 0.0.0.0:5000
+#   WEB_CONCURRENCY      worker processes (default WORKERS_PER_CORE x cores + 1)
+#   WORKERS_PER_CORE     default 2
+#   THREADS              threads per worker (default 4)
+#   MAX_REQUESTS         requests before a worker is recycled (default 1000)
+#   TIMEOUT              seconds before a silent worker is killed (default 60)
+#   GRACEFUL_TIMEOUT     seconds to finish in-flight requests (default 30)
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+cores = multiprocessing.cpu_count()
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = _env_int('WEB_CONCURRENCY', _env_int('WORKERS_PER_CORE', 2) * cores + 1)
+threads = _env_int('THREADS', 4)
+# gthread stops accepting when it is reloaded or recycled and finishes
+# the requests it is serving within graceful_timeout
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = True
+
+max_requests = _env_int('MAX_REQUESTS', 1000)
+# Spread the restarts so the workers are not all recycled at once
+max_requests_jitter = max_requests // 10
+timeout = _env_int('TIMEOUT', 60)
+graceful_timeout = _env_int('GRACEFUL_TIMEOUT', 30)
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+# Workers add up their request metrics through this folder (src/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+
+def on_starting(server):
+    # Numbers from a previous run of the server are not carried over
+    folder = os.environ['METRICS_DIR']
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+
+def post_fork(server, worker):
+    # Connections opened in the master while preloading must not be shared
+    # with the forked workers
+    from src.main import app
+    from src.models.user import db
+    from src.contact_queue import start_flusher
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Every worker drains the contact queue (src/contact_queue.py)
+    start_flusher(app)
+
+def worker_exit(server, worker):
+    from src.metrics import registry
+    from src.contact_queue import stop_flusher
+
+    stop_flusher()
+    registry.retire()
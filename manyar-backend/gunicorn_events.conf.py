@@ -0,0 +1,44 @@
+import os
+
+# Server for the admin panel's event streams (GET /api/admin/events, see
+# src/events.py), run next to the main server:
+#
+#   gunicorn -c gunicorn.conf.py src.main:app
+#   gunicorn -c gunicorn_events.conf.py src.main:app
+#
+# An open stream holds its request handler for minutes. gevent workers
+# run every handler as a greenlet, so one worker keeps many streams open
+# without a thread each. The reverse proxy sends /api/admin/events here,
+# unbuffered, and everything else to the main server, e.g. for nginx:
+#
+#   location /api/admin/events {
+#       proxy_pass http://127.0.0.1:5001;
+#       proxy_buffering off;
+#       proxy_read_timeout 1h;
+#   }
+#
+# Environment:
+#   EVENTS_BIND          default 127.0.0.1:5001
+#   EVENTS_WORKERS       worker processes (default 1)
+#   EVENTS_MAX_STREAMS   open streams per worker (default 100, src/events.py)
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+bind = os.environ.get('EVENTS_BIND', '127.0.0.1:5001')
+workers = _env_int('EVENTS_WORKERS', 1)
+worker_class = 'gevent'
+# Room for the streams and the requests refused with 503 once they are full
+worker_connections = _env_int('EVENTS_MAX_STREAMS', 100) + 20
+# The app is imported in each worker after gevent has patched the
+# standard library
+preload_app = False
+
+timeout = 60
+# Streams end by themselves within STREAM_SECONDS; a restart does not wait
+# for them, EventSource reconnects and resumes
+graceful_timeout = 5
+
+accesslog = '-'
+errorlog = '-'
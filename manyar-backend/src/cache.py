@@ -0,0 +1,126 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import request, make_response, Response
+from src.events import publish
+
+# In-process cache of serialized catalog responses. Entries are keyed by
+# path + normalized query string and tagged with the catalog version at the
+# time they were built; any catalog write bumps the version, which makes
+# every older entry stale.
+#
+# Each worker process of a multi-process server has its own cache. They
+# share invalidations through the modification time of a file: a write
+# touches it, and every lookup compares its mtime with the last one seen.
+
+MAX_ENTRIES = 256
+
+class ResponseCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = 0
+        self.shared_path = None
+        self._shared_mtime = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def share(self, path):
+        # The file is created by the first invalidation, not here: creating
+        # the app must not write anything
+        with self._lock:
+            self.shared_path = path
+            try:
+                self._shared_mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                self._shared_mtime = None
+
+    def _touch(self):
+        # Called with the lock held
+        now = time.time_ns()
+        os.makedirs(os.path.dirname(self.shared_path), exist_ok=True)
+        with open(self.shared_path, 'a'):
+            pass
+        os.utime(self.shared_path, ns=(now, now))
+        self._shared_mtime = os.stat(self.shared_path).st_mtime_ns
+
+    def _sync(self):
+        # Called with the lock held
+        if self.shared_path is None:
+            return
+        try:
+            mtime = os.stat(self.shared_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._shared_mtime:
+            self._shared_mtime = mtime
+            self.version += 1
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != self.version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, body, mimetype, version):
+        entry = {
+            'body': body,
+            'mimetype': mimetype,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'version': version
+        }
+        with self._lock:
+            # A write may have happened while the response was being built
+            if version == self.version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            if self.shared_path is not None:
+                self._touch()
+            self.version += 1
+            self._entries.clear()
+
+catalog_cache = ResponseCache()
+
+def invalidate_catalog():
+    catalog_cache.invalidate()
+    # Tells open admin panels (src/events.py)
+    publish('catalog', {})
+
+def cache_key():
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f'{request.path}?{query}'
+
+def cached_response(f):
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = cache_key()
+        entry = catalog_cache.get(key)
+
+        if entry is None:
+            version = catalog_cache.version
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = catalog_cache.set(key, response.get_data(), response.mimetype, version)
+
+        if entry['etag'] in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return decorated_function
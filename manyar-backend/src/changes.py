@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.changes import ChangeLog, ChangeLogHorizon
+
+# Change feed for catalog clients (GET /api/changes?since=<token>). On
+# SQLite, triggers on category, product and product_image replace the
+# entity's change_log row on every insert, update and delete, so bulk
+# updates, imports and cascaded deletes are recorded as well as the single
+# row routes, in the same transaction as the write. A client keeps the
+# highest id it has seen as its token and asks for the rows after it: a
+# range scan on the primary key that is empty most of the time.
+#
+# Each entity has at most one row, so a client only ever gets its latest
+# state. Deleted entities keep a tombstone row until `flask prune-changes`
+# removes the ones older than the retention period and moves the horizon
+# (the newest pruned id) past them. Tokens are "<change id>.<horizon>": a
+# client that started syncing before the last prune and is still behind
+# the horizon may have missed a tombstone, so its token is refused and it
+# syncs again from 0.
+#
+# Saving a product also marks its category as changed (products_count).
+
+ENTITIES = {
+    # entity: table
+    'category': 'category',
+    'product': 'product',
+    'image': 'product_image',
+}
+RETENTION_DAYS = 30
+
+class TokenExpired(Exception):
+    pass
+
+def _record(entity, row, deleted):
+    return (
+        'REPLACE INTO change_log (entity, entity_id, deleted, changed_at) '
+        f"VALUES ('{entity}', {row}, {deleted}, datetime('now'));"
+    )
+
+def _touch_category(column):
+    # Skipped while the category itself is being deleted (the product rows
+    # go by cascade), so its tombstone is not replaced
+    return (
+        'REPLACE INTO change_log (entity, entity_id, deleted, changed_at) '
+        f"SELECT 'category', {column}, 0, datetime('now') WHERE EXISTS (SELECT 1 FROM category WHERE id = {column});"
+    )
+
+def _triggers():
+    triggers = {}
+    for entity, table in ENTITIES.items():
+        triggers[f'change_{entity}_insert'] = (f'AFTER INSERT ON {table}', [_record(entity, 'NEW.id', 0)])
+        triggers[f'change_{entity}_update'] = (f'AFTER UPDATE ON {table}', [_record(entity, 'NEW.id', 0)])
+        triggers[f'change_{entity}_delete'] = (f'AFTER DELETE ON {table}', [_record(entity, 'OLD.id', 1)])
+    triggers['change_product_insert'][1].append(_touch_category('NEW.category_id'))
+    triggers['change_product_update'][1].extend([_touch_category('OLD.category_id'), _touch_category('NEW.category_id')])
+    triggers['change_product_delete'][1].append(_touch_category('OLD.category_id'))
+    return triggers
+
+TRIGGERS = _triggers()
+
+def create_triggers(conn):
+    # Tables rebuilt by later migrations lose their triggers; call this again
+    for name, (event, statements) in TRIGGERS.items():
+        conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+        conn.exec_driver_sql(f'CREATE TRIGGER {name} {event} BEGIN {" ".join(statements)} END')
+
+def backfill(conn):
+    # Databases that had rows before the change log existed: one entry per
+    # row, parents first, so syncing from 0 returns the whole catalog
+    if conn.exec_driver_sql('SELECT 1 FROM change_log LIMIT 1').first() is not None:
+        return
+    for entity, table in ENTITIES.items():
+        conn.exec_driver_sql(
+            'INSERT INTO change_log (entity, entity_id, deleted, changed_at) '
+            f"SELECT '{entity}', id, 0, datetime('now') FROM {table} ORDER BY id"
+        )
+
+def changes_available():
+    return db.engine.dialect.name == 'sqlite'
+
+def parse_token(token):
+    # '0' (start from scratch) or a next_token from a previous response
+    try:
+        change_id, _, horizon = token.partition('.')
+        change_id, horizon = int(change_id), int(horizon or 0)
+    except ValueError:
+        raise ValueError('since must be a token from a previous response, or 0')
+    if change_id < 0 or horizon < 0:
+        raise ValueError('since must be a token from a previous response, or 0')
+    return change_id, horizon
+
+def read_changes(token, limit):
+    # Returns (rows, next_token, has_more); rows are (entity, entity_id,
+    # deleted) in change order. Raises ValueError and TokenExpired
+    since, known_horizon = parse_token(token)
+    horizon = db.session.scalar(db.select(db.func.max(ChangeLogHorizon.up_to))) or 0
+    if 0 < since < horizon and known_horizon < horizon:
+        raise TokenExpired()
+
+    rows = db.session.execute(
+        db.select(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.deleted)
+        .filter(ChangeLog.id > since).order_by(ChangeLog.id).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if not rows:
+        # A token from another database (or a restored backup) would
+        # otherwise wait forever
+        latest = db.session.scalar(db.select(db.func.max(ChangeLog.id))) or 0
+        if since > latest:
+            raise TokenExpired()
+        return [], f'{since}.{horizon}', False
+
+    changes = [(entity, entity_id, deleted) for _, entity, entity_id, deleted in rows]
+    return changes, f'{rows[-1].id}.{horizon}', has_more
+
+def prune(days=RETENTION_DAYS):
+    # Drops tombstones older than `days`; returns how many
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    old_tombstones = db.select(ChangeLog.id).filter(ChangeLog.deleted, ChangeLog.changed_at < cutoff)
+
+    up_to = db.session.scalar(db.select(db.func.max(old_tombstones.subquery().c.id)))
+    if up_to is None:
+        return 0
+
+    pruned = db.session.execute(
+        db.delete(ChangeLog).filter(ChangeLog.id.in_(old_tombstones)), execution_options={'synchronize_session': False}
+    ).rowcount
+    horizon = db.session.get(ChangeLogHorizon, 1)
+    if horizon is None:
+        db.session.add(ChangeLogHorizon(id=1, up_to=up_to))
+    else:
+        horizon.up_to = max(horizon.up_to, up_to)
+    db.session.commit()
+    return pruned
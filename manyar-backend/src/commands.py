@@ -0,0 +1,171 @@
+import click
+from flask.cli import with_appcontext
+from src.models.user import db
+
+# Flask CLI commands for the one-off setup work that used to run inside
+# create_app() on every import (in every worker):
+#
+#   flask --app src.main init-db        create tables, migrate and seed
+#   flask --app src.main migrate        create new tables and apply migrations
+#   flask --app src.main seed           add the default categories to an empty database
+#   flask --app src.main build-static   write .gz / .br siblings for the frontend build
+#   flask --app src.main flush-contacts write queued contact messages to the database now
+#   flask --app src.main prune-changes  drop change feed tombstones past the retention period
+#   flask --app src.main rebuild-snapshots  rebuild every product snapshot
+#   flask --app src.main check-snapshots    compare product snapshots with the live rows
+
+DEFAULT_CATEGORIES = [
+    {
+        'name_ar': 'خدمات تقنية متكاملة',
+        'name_en': 'Integrated Technical Services',
+        'description_ar': 'صيانة حواسيب، خدمات برمجية، تركيب شبكات، ودعم فني متخصص',
+        'description_en': 'Computer maintenance, software services, network installation, and specialized technical support',
+        'icon': 'wrench',
+        'whatsapp_link': 'https://wa.me/message/HWIIVWSQTBZXM1',
+        'phone_number': '+963947993132'
+    },
+    {
+        'name_ar': 'بيع وشراء الحواسيب',
+        'name_en': 'Computer Sales & Purchase',
+        'description_ar': 'أجهزة جديدة ومستعملة، شاشات، طابعات، لوحات مفاتيح وإكسسوارات',
+        'description_en': 'New and used devices, monitors, printers, keyboards and accessories',
+        'icon': 'computer',
+        'whatsapp_link': 'https://wa.me/message/HWIIVWSQTBZXM1',
+        'phone_number': '+963947993132'
+    },
+    {
+        'name_ar': 'خدمات الطباعة والقرطاسية',
+        'name_en': 'Printing & Stationery Services',
+        'description_ar': 'طباعة أبحاث، دفاتر، أطروحات، تصوير ملخصات وبيع قرطاسية جامعية',
+        'description_en': 'Research printing, notebooks, theses, summary copying and university stationery sales',
+        'icon': 'printer',
+        'whatsapp_link': 'https://wa.me/963969597967',
+        'phone_number': '+963969597967'
+    },
+    {
+        'name_ar': 'مواد التجميل والعناية',
+        'name_en': 'Beauty & Care Products',
+        'description_ar': 'منتجات عناية أصلية، ماركات موثوقة للبشرة والشعر والعطورات',
+        'description_en': 'Original care products, trusted brands for skin, hair and perfumes',
+        'icon': 'sparkles',
+        'whatsapp_link': 'https://wa.me/963936086895',
+        'phone_number': '+963936086895'
+    }
+]
+
+def load_models():
+    # Every model has to be imported before create_all() can see its table
+    from src.models import changes, product, product_image, snapshot, stats, user  # noqa: F401
+
+def migrate_database():
+    from src.migrations import upgrade
+    from src.snapshots import build_pending, snapshots_available
+
+    load_models()
+    db.create_all()
+    # Bring databases created by older versions up to date
+    applied = upgrade()
+    if snapshots_available():
+        # Snapshots left empty by the migrations
+        build_pending(db.session)
+        db.session.commit()
+    return applied
+
+def seed_categories():
+    from src.models.product import Category
+
+    if Category.query.first() is not None:
+        return 0
+    for category_data in DEFAULT_CATEGORIES:
+        db.session.add(Category(**category_data))
+    db.session.commit()
+    return len(DEFAULT_CATEGORIES)
+
+def init_database():
+    applied = migrate_database()
+    return applied, seed_categories()
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the tables, apply migrations and add the default categories."""
+    applied, seeded = init_database()
+    click.echo(f'Applied {len(applied)} migration(s), added {seeded} categories')
+
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Create new tables and apply pending migrations."""
+    applied = migrate_database()
+    for name in applied:
+        click.echo(f'Applied {name}')
+    click.echo(f'Applied {len(applied)} migration(s)')
+
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    """Add the default categories if there are none."""
+    click.echo(f'Added {seed_categories()} categories')
+
+@click.command('build-static')
+@with_appcontext
+def build_static_command():
+    """Write precompressed siblings for the frontend build in src/static."""
+    from flask import current_app
+    from src.static_files import build_index
+
+    index = build_index(precompress=True)
+    current_app.extensions['static_index'] = index
+    compressed = sum(1 for entry in index.values() if entry['encodings'])
+    click.echo(f'Indexed {len(index)} files, {compressed} precompressed')
+
+@click.command('flush-contacts')
+@with_appcontext
+def flush_contacts_command():
+    """Write queued contact form submissions to the database."""
+    from src.contact_queue import get_queue
+
+    click.echo(f'Wrote {get_queue().flush()} queued message(s)')
+
+@click.command('prune-changes')
+@click.option('--days', type=int, default=None, help='Keep tombstones this many days (default 30)')
+@with_appcontext
+def prune_changes_command(days):
+    """Drop change feed tombstones older than the retention period."""
+    from src.changes import RETENTION_DAYS, prune
+
+    click.echo(f'Pruned {prune(RETENTION_DAYS if days is None else days)} tombstone(s)')
+
+@click.command('rebuild-snapshots')
+@with_appcontext
+def rebuild_snapshots_command():
+    """Build every product snapshot from the live rows."""
+    from src.snapshots import rebuild_snapshots, snapshots_available
+
+    if not snapshots_available():
+        raise click.ClickException('Product snapshots are only kept on SQLite')
+    click.echo(f'Rebuilt {rebuild_snapshots()} snapshot(s)')
+
+@click.command('check-snapshots')
+@click.option('--fix', is_flag=True, help='Rebuild the snapshots that differ and delete orphans')
+@with_appcontext
+def check_snapshots_command(fix):
+    """Compare the product snapshots with the live rows."""
+    from src.snapshots import check_snapshots, snapshots_available
+
+    if not snapshots_available():
+        raise click.ClickException('Product snapshots are only kept on SQLite')
+    result = check_snapshots(fix=fix)
+    click.echo(
+        f"Checked {result['checked']} product(s): {result['stale']} stale, "
+        f"{result['missing']} missing, {result['orphaned']} orphaned"
+    )
+    if not fix and (result['stale'] or result['missing'] or result['orphaned']):
+        raise click.ClickException('Snapshots differ from the live rows; run again with --fix')
+
+def register_commands(app):
+    for command in (
+        init_db_command, migrate_command, seed_command, build_static_command,
+        flush_contacts_command, prune_changes_command, rebuild_snapshots_command, check_snapshots_command
+    ):
+        app.cli.add_command(command)
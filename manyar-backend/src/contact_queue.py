@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+
+# Write-behind queue for contact form submissions. POST /contact validates
+# the message and appends it to a small SQLite file of its own (like the
+# rate limit buckets), so the request never waits for the app database's
+# write lock; a flusher thread in each worker process moves the queued
+# messages into contact_message in batches every FLUSH_MS. The stat_counter
+# triggers fire for every row of a batch, and created_at is the time the
+# message was received, not the time it was flushed.
+#
+# A submission identical to one received in the last DEDUPE_SECONDS (same
+# name, email and message, ignoring case and extra whitespace) is
+# acknowledged but not queued again.
+#
+# A flusher claims a batch before writing it and deletes it from the queue
+# once the app database has committed it. Claims left by a process that
+# died are taken over after CLAIM_TIMEOUT, so an acknowledged message is
+# never lost; a crash between the two commits can write it twice.
+#
+# Environment:
+#   CONTACT_QUEUE_DB         queue file (default instance/contact_queue.db)
+#   CONTACT_FLUSH_MS         default 250
+#   CONTACT_DEDUPE_SECONDS   default 600
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+CLAIM_TIMEOUT = 60
+# Also picks up messages queued by workers that exited before flushing
+IDLE_INTERVAL = 5
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS message ('
+    'id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, message TEXT NOT NULL, '
+    'received REAL NOT NULL, claim TEXT, claimed REAL)',
+    'CREATE TABLE IF NOT EXISTS recent (fingerprint TEXT PRIMARY KEY, received REAL NOT NULL) WITHOUT ROWID',
+]
+
+# Returns a row unless the same submission was seen within the window
+REMEMBER = '''
+INSERT INTO recent (fingerprint, received) VALUES (:fingerprint, :now)
+ON CONFLICT(fingerprint) DO UPDATE SET received = :now WHERE received < :cutoff
+RETURNING fingerprint
+'''
+
+CLAIM = '''
+UPDATE message SET claim = :claim, claimed = :now
+WHERE id IN (
+    SELECT id FROM message WHERE claim IS NULL OR claimed < :expired ORDER BY id LIMIT :limit
+)
+RETURNING name, email, message, received
+'''
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+def fingerprint(name, email, message):
+    parts = [' '.join(value.split()).lower() for value in (name, email, message)]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+class ContactQueue:
+    def __init__(self, path, flush_interval, dedupe_seconds):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dedupe_seconds = dedupe_seconds
+        self._local = threading.local()
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._app = None
+
+    def _connection(self):
+        # One connection per thread; transactions are opened explicitly.
+        # synchronous = FULL because an acknowledged message has to survive
+        # a power loss, not only a crash of the server
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = FULL')
+            with self._lock:
+                if not self._initialized:
+                    for statement in SCHEMA:
+                        conn.execute(statement)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, name, email, message):
+        # Returns False for a duplicate of a recent submission
+        conn = self._connection()
+        now = time.time()
+        params = {'fingerprint': fingerprint(name, email, message), 'now': now, 'cutoff': now - self.dedupe_seconds}
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            queued = conn.execute(REMEMBER, params).fetchone() is not None
+            if queued:
+                conn.execute(
+                    'INSERT INTO message (name, email, message, received) VALUES (?, ?, ?, ?)',
+                    (name, email, message, now)
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if queued:
+            self._wake.set()
+        return queued
+
+    def pending(self):
+        return self._connection().execute('SELECT COUNT(*) FROM message').fetchone()[0]
+
+    def flush(self):
+        # Moves every claimable message into contact_message; needs an app
+        # context. Returns the number of messages written
+        from src.models.product import ContactMessage, db
+        from src.events import publish_many
+
+        conn = self._connection()
+        written = 0
+        while True:
+            claim, now = uuid.uuid4().hex, time.time()
+            rows = conn.execute(CLAIM, {
+                'claim': claim, 'now': now, 'expired': now - CLAIM_TIMEOUT, 'limit': BATCH_SIZE
+            }).fetchall()
+            if not rows:
+                break
+
+            try:
+                messages = db.session.scalars(
+                    db.insert(ContactMessage).returning(ContactMessage, sort_by_parameter_order=True),
+                    [
+                        {
+                            'name': name,
+                            'email': email,
+                            'message': message,
+                            'is_read': False,
+                            'created_at': datetime.utcfromtimestamp(received),
+                        }
+                        for name, email, message, received in rows
+                    ]
+                ).all()
+                # Serialized before the commit expires them
+                created = [message.to_dict() for message in messages]
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                conn.execute('UPDATE message SET claim = NULL WHERE claim = ?', (claim,))
+                raise
+            conn.execute('DELETE FROM message WHERE claim = ?', (claim,))
+            publish_many('contact', created)
+            written += len(rows)
+
+        conn.execute('DELETE FROM recent WHERE received < ?', (time.time() - self.dedupe_seconds,))
+        return written
+
+    # Flusher thread
+
+    def start(self, app):
+        with self._lock:
+            if self._thread is None:
+                self._app = app
+                self._thread = threading.Thread(target=self._run, name='contact-flusher', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        # Writes whatever is still queued; called when a worker exits
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout=self.flush_interval + 5)
+
+    def _run(self):
+        while True:
+            self._wake.wait(IDLE_INTERVAL)
+            self._wake.clear()
+            if not self._stopping:
+                # Let the submissions of the next moment join this batch
+                time.sleep(self.flush_interval)
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception:
+                logger.exception('Flushing queued contact messages failed; retrying')
+            if self._stopping:
+                return
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ContactQueue(
+                os.environ.get('CONTACT_QUEUE_DB') or os.path.join(current_app.instance_path, 'contact_queue.db'),
+                flush_interval=_env_float('CONTACT_FLUSH_MS', 250) / 1000,
+                dedupe_seconds=_env_float('CONTACT_DEDUPE_SECONDS', 600),
+            )
+        return _queue
+
+def start_flusher(app):
+    with app.app_context():
+        get_queue().start(app)
+
+def stop_flusher():
+    if _queue is not None:
+        _queue.stop()
@@ -0,0 +1,101 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Database engine configuration, read from the environment:
+#
+#   DATABASE_URL            default sqlite:///manyar.db (in the instance
+#                           folder). A postgresql:// URL works with the same
+#                           models (install psycopg2-binary); search and the
+#                           dashboard counters then fall back to plain queries.
+#   DB_POOL_SIZE            connections kept open per process (default 5)
+#   DB_MAX_OVERFLOW         extra connections under load (default 10)
+#   DB_POOL_TIMEOUT         seconds to wait for a free connection (default 30)
+#   DB_POOL_RECYCLE         seconds before a server connection is replaced
+#                           (default 1800, not used for SQLite)
+#
+# SQLite connections get these pragmas every time they are opened. WAL lets
+# readers run while a write is in progress, and busy_timeout makes a second
+# writer wait for the lock instead of failing with "database is locked".
+#
+#   SQLITE_JOURNAL_MODE     default WAL
+#   SQLITE_SYNCHRONOUS      default NORMAL (safe with WAL, fsyncs on checkpoint)
+#   SQLITE_BUSY_TIMEOUT     milliseconds (default 5000)
+#   SQLITE_CACHE_SIZE       page cache in KiB (default 16384)
+#   SQLITE_MMAP_SIZE        bytes of the file to memory-map (default 268435456)
+#
+# foreign_keys is always on: deleting a category or product relies on the
+# ON DELETE CASCADE clauses of the tables that reference it.
+
+DEFAULT_DATABASE_URL = 'sqlite:///manyar.db'
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def database_url():
+    url = os.environ.get('DATABASE_URL') or DEFAULT_DATABASE_URL
+    # Heroku-style URLs use the scheme name SQLAlchemy dropped in 1.4
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def engine_options(url):
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory databases use a single shared connection
+        return {}
+
+    options = {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+    }
+    if url.get_backend_name() != 'sqlite':
+        options['pool_recycle'] = _env_int('DB_POOL_RECYCLE', 1800)
+        options['pool_pre_ping'] = True
+    return options
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT', 5000),
+        # Negative cache_size is in KiB rather than pages
+        'cache_size': -_env_int('SQLITE_CACHE_SIZE', 16384),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    }
+
+def configure_database(app):
+    url = database_url()
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite' and parsed.database not in (None, '', ':memory:') \
+            and not parsed.query.get('uri') and not os.path.isabs(parsed.database):
+        # Resolved here rather than by Flask-SQLAlchemy, which creates the
+        # instance folder as soon as the app is created
+        url = parsed.set(database=os.path.join(app.instance_path, parsed.database)).render_as_string(hide_password=False)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    app.config['SQLITE_PRAGMAS'] = sqlite_pragmas()
+
+def install_pragmas(engine, pragmas):
+    if engine.dialect.name != 'sqlite':
+        return
+
+    database = engine.url.database
+    if database not in (None, '', ':memory:') and not engine.url.query.get('uri'):
+        @event.listens_for(engine, 'do_connect')
+        def create_folder(dialect, connection_record, cargs, cparams):
+            # SQLite creates a missing database file but not its folder
+            os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from flask import current_app, has_app_context
+
+# Live updates for the admin panel over Server-Sent Events
+# (GET /api/admin/events, src/routes/events.py).
+#
+# Write paths publish() an event once they have committed: new contact
+# messages (contact), messages marked read or unread (contact_update) or
+# deleted (contact_delete), and catalog edits (catalog, from
+# invalidate_catalog()). Events are appended to a small SQLite file of their
+# own, like the rate limit buckets, so every worker process sees every
+# event; their ids are the SSE event ids, so a reconnecting EventSource
+# resumes after the last one it got (Last-Event-ID). The file keeps the last
+# KEEP_EVENTS events, and a client that is further behind gets a reset
+# event and reloads.
+#
+# A stream is a plain generator response (poll_events()) that reads new
+# events every POLL_INTERVAL, follows every batch with a stats event
+# carrying the dashboard numbers that changed, writes a heartbeat comment
+# every HEARTBEAT seconds and ends after STREAM_SECONDS; EventSource
+# reconnects by itself. A stream only holds a pooled database connection
+# while it reads the stats, so EVENTS_MAX_STREAMS is not bounded by
+# DB_POOL_SIZE + DB_MAX_OVERFLOW (src/database.py); streams reading at the
+# same moment wait up to DB_POOL_TIMEOUT for a connection. An open stream holds its request handler, so
+# streams are only served by a gevent worker, where a handler is a
+# greenlet: run gunicorn_events.conf.py next to the main server and route
+# /api/admin/events to it. Other servers answer 501 and log why, unless
+# EVENTS_THREADED=1 lets them spend a thread per stream (flask run).
+#
+# Environment:
+#   EVENTS_DB               event file (default instance/events.db)
+#   EVENTS_MAX_STREAMS      open streams per worker process (default 100)
+#   EVENTS_THREADED         1 serves streams without gevent, a thread each
+
+logger = logging.getLogger(__name__)
+
+KEEP_EVENTS = 1000
+CLEANUP_PROBABILITY = 0.05
+POLL_INTERVAL = 0.5
+HEARTBEAT = 15
+STREAM_SECONDS = 300
+# Reconnection delay suggested to EventSource, in milliseconds
+RETRY_MS = 3000
+
+class EventLog:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # One connection per thread, in autocommit mode. Events only matter
+        # while the server runs, so synchronous = OFF
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            with self._lock:
+                if not self._initialized:
+                    # AUTOINCREMENT: ids are never reused after a cleanup
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS event ('
+                        'id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, data TEXT NOT NULL)'
+                    )
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def append(self, event_type, items):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO event (type, data) VALUES (?, ?)',
+                [(event_type, json.dumps(data, separators=(',', ':'))) for data in items]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if random.random() < CLEANUP_PROBABILITY:
+            self.cleanup()
+
+    def read(self, after):
+        # Returns (id, type, data) rows, oldest first
+        return self._connection().execute(
+            'SELECT id, type, data FROM event WHERE id > ? ORDER BY id LIMIT ?', (after, KEEP_EVENTS)
+        ).fetchall()
+
+    def bounds(self):
+        # (oldest, latest) id still in the file; (None, None) when empty
+        return self._connection().execute('SELECT MIN(id), MAX(id) FROM event').fetchone()
+
+    def cleanup(self):
+        self._connection().execute(
+            'DELETE FROM event WHERE id <= (SELECT MAX(id) FROM event) - ?', (KEEP_EVENTS,)
+        )
+
+def format_event(event_type, data, event_id=None):
+    # data is already JSON (a single line)
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event_type}', f'data: {data}']
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+def format_stats(stats):
+    return format_event('stats', json.dumps(stats, separators=(',', ':')))
+
+def stats_delta(previous, stats):
+    if previous is None:
+        return stats
+    return {key: value for key, value in stats.items() if previous.get(key) != value}
+
+def resume_point(log, last_event_id):
+    # Returns (id to stream after, reset). Without a Last-Event-ID the stream
+    # starts with the next event: the page has just loaded everything. A
+    # client behind the oldest kept event, or with an id from another event
+    # file, has missed something and starts over
+    oldest, latest = log.bounds()
+    latest = latest or 0
+    if last_event_id is None:
+        return latest, False
+    if last_event_id > latest or (oldest is not None and last_event_id < oldest - 1):
+        return latest, True
+    return last_event_id, False
+
+def opening(resume_id, reset, stats):
+    # First bytes of every stream
+    payload = f'retry: {RETRY_MS}\n\n'.encode('ascii')
+    if reset:
+        payload += format_event('reset', '{}', resume_id)
+    return payload + format_stats(stats)
+
+def streaming_supported():
+    if os.environ.get('EVENTS_THREADED') == '1':
+        return True
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+def poll_events(log, resume_id, stats, read_stats):
+    # Body of a stream, after opening(resume_id, reset, stats). Runs after
+    # the request has ended: read_stats has to open its own app context
+    last_id = resume_id
+    started = time.monotonic()
+    next_heartbeat = started + HEARTBEAT
+    while time.monotonic() - started < STREAM_SECONDS:
+        rows = log.read(last_id)
+        if rows:
+            last_id = rows[-1][0]
+            payload = b''.join(format_event(event_type, data, event_id) for event_id, event_type, data in rows)
+            current = read_stats()
+            delta = stats_delta(stats, current)
+            stats = current
+            yield payload + (format_stats(delta) if delta else b'')
+            next_heartbeat = time.monotonic() + HEARTBEAT
+        elif time.monotonic() >= next_heartbeat:
+            yield b': ping\n\n'
+            next_heartbeat = time.monotonic() + HEARTBEAT
+        time.sleep(POLL_INTERVAL)
+
+_log = None
+_open_streams = 0
+_state_lock = threading.Lock()
+
+def get_log():
+    global _log
+    with _state_lock:
+        if _log is None:
+            _log = EventLog(os.environ.get('EVENTS_DB') or os.path.join(current_app.instance_path, 'events.db'))
+        return _log
+
+def open_stream():
+    # Counts a stream in; False when the process has EVENTS_MAX_STREAMS open
+    global _open_streams
+    with _state_lock:
+        if _open_streams >= int(os.environ.get('EVENTS_MAX_STREAMS') or 100):
+            return False
+        _open_streams += 1
+        return True
+
+def close_stream():
+    global _open_streams
+    with _state_lock:
+        _open_streams -= 1
+
+def publish(event_type, data):
+    publish_many(event_type, [data])
+
+def publish_many(event_type, items):
+    # Called after the write has committed. A failure is logged and never
+    # fails the write
+    if not items or not has_app_context():
+        return
+    try:
+        get_log().append(event_type, items)
+    except Exception:
+        logger.exception('Publishing %s events failed', event_type)
@@ -0,0 +1,226 @@
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from flask import abort, current_app, send_file
+from werkzeug.security import safe_join
+from src.static_files import IMMUTABLE_CACHE
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # variants are skipped, originals are still stored
+    Image = None
+
+# Uploaded images are stored under the SHA-256 of their content, so
+# uploading the same file twice reuses the stored copy. Resized WebP
+# variants are generated next to the original on a small background pool
+# so the upload request does not wait for them:
+#
+#   <hash>.<ext>          original bytes
+#   <hash>_thumb.webp     max 200px
+#   <hash>_card.webp      max 600px
+#   <hash>_full.webp      max 1600px
+#
+# A stored file is never rewritten under the same name, so GET /uploads/
+# (send_upload) marks responses as immutable and answers conditional and
+# range requests. With UPLOAD_OFFLOAD set the app only checks the name and
+# the front proxy sends the file, which it then has to serve from an
+# internal location, e.g. for nginx:
+#
+#   location /protected-uploads/ { internal; alias <UPLOAD_FOLDER>/; }
+#
+# Environment:
+#   UPLOAD_OFFLOAD        x-accel-redirect (nginx) or x-sendfile (Apache
+#                         mod_xsendfile, lighttpd); unset sends from Python
+#   UPLOAD_ACCEL_PREFIX   internal location for x-accel-redirect
+#                         (default /protected-uploads/)
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
+UPLOAD_URL = '/uploads'
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Pillow format: extensions it is stored under (the first one if the
+# uploaded name says otherwise)
+FORMAT_EXTENSIONS = {
+    'PNG': ('png',),
+    'JPEG': ('jpg', 'jpeg'),
+    'GIF': ('gif',),
+    'WEBP': ('webp',),
+}
+
+VARIANTS = {
+    'thumb': 200,
+    'card': 600,
+    'full': 1600,
+}
+WEBP_QUALITY = 80
+WORKERS = 2
+
+OFFLOAD_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+UPLOAD_OFFLOAD = (os.environ.get('UPLOAD_OFFLOAD') or '').lower() or None
+if UPLOAD_OFFLOAD is not None and UPLOAD_OFFLOAD not in OFFLOAD_HEADERS:
+    raise ValueError(f'UPLOAD_OFFLOAD must be one of {", ".join(OFFLOAD_HEADERS)}')
+ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX') or '/protected-uploads/'
+# An original standing in for a variant that is not generated yet
+PENDING_VARIANT_CACHE = 'public, max-age=60'
+
+HASHED_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})\.(?P<ext>\w+)$')
+VARIANT_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})_(?P<variant>\w+)\.webp$')
+
+class InvalidImage(Exception):
+    pass
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+def _get_executor():
+    # Created on first use so forked server workers each get their own threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='image-variants')
+        return _executor
+
+def variant_filename(digest, variant):
+    return f'{digest}_{variant}.webp'
+
+def variant_urls(image_url):
+    # Only content-hashed uploads have variants; older uploads and
+    # external URLs are returned as-is by the caller
+    match = HASHED_NAME.match(os.path.basename(image_url or ''))
+    if not match or not image_url.startswith(f'{UPLOAD_URL}/'):
+        return {}
+    digest = match.group('digest')
+    return {variant: f'{UPLOAD_URL}/{variant_filename(digest, variant)}' for variant in VARIANTS}
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def generate_variants(digest, source_path):
+    try:
+        with Image.open(source_path) as source:
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ('RGB', 'RGBA'):
+                source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+            for variant, size in VARIANTS.items():
+                path = os.path.join(UPLOAD_FOLDER, variant_filename(digest, variant))
+                if os.path.exists(path):
+                    continue
+                image = source.copy()
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                tmp_path = f'{path}.{threading.get_ident()}.tmp'
+                image.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+                os.replace(tmp_path, path)
+    except Exception:
+        # Runs on the pool, where nobody waits for the result; the original
+        # keeps standing in for the missing variants
+        logger.exception('Generating variants of %s failed', source_path)
+    finally:
+        with _executor_lock:
+            _pending.discard(digest)
+
+def schedule_variants(digest, source_path):
+    if Image is None:
+        return
+    if all(os.path.exists(os.path.join(UPLOAD_FOLDER, variant_filename(digest, v))) for v in VARIANTS):
+        return
+    with _executor_lock:
+        if digest in _pending:
+            return
+        _pending.add(digest)
+    _get_executor().submit(generate_variants, digest, source_path)
+
+def image_extension(data, ext):
+    # Returns the extension to store data under; raises InvalidImage unless
+    # it is an image in one of the allowed formats. Without Pillow only the
+    # file name has been checked
+    if Image is None:
+        return ext
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+            image_format = image.format
+    except Exception:
+        raise InvalidImage('The file is not a valid image')
+    if image_format not in FORMAT_EXTENSIONS:
+        raise InvalidImage('Invalid file type')
+    extensions = FORMAT_EXTENSIONS[image_format]
+    return ext if ext in extensions else extensions[0]
+
+def store_upload(file, ext):
+    # Raises InvalidImage
+    data = file.read()
+    ext = image_extension(data, ext)
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+    digest = hashlib.sha256(data).hexdigest()
+    filename = f'{digest}.{ext}'
+    path = os.path.join(UPLOAD_FOLDER, filename)
+
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    schedule_variants(digest, path)
+
+    file_url = f'{UPLOAD_URL}/{filename}'
+    return {'file_url': file_url, 'variants': variant_urls(file_url)}
+
+def find_original(filename):
+    # Variants that are not generated yet (or cannot be, without Pillow)
+    # fall back to the original upload
+    match = VARIANT_NAME.match(filename)
+    if not match:
+        return None
+    for ext in ALLOWED_EXTENSIONS:
+        candidate = f'{match.group("digest")}.{ext}'
+        if os.path.exists(os.path.join(UPLOAD_FOLDER, candidate)):
+            return candidate
+    return None
+
+def _upload_etag(filename, stat):
+    # Content-hashed names identify the bytes on every server
+    if HASHED_NAME.match(filename) or VARIANT_NAME.match(filename):
+        return os.path.splitext(filename)[0]
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+def send_upload(filename):
+    path = safe_join(UPLOAD_FOLDER, filename)
+    cache_control = IMMUTABLE_CACHE
+    if path is None or not os.path.isfile(path):
+        original = find_original(filename)
+        if original is None:
+            abort(404)
+        filename, path = original, os.path.join(UPLOAD_FOLDER, original)
+        cache_control = PENDING_VARIANT_CACHE
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if UPLOAD_OFFLOAD:
+        # The proxy answers conditional and range requests itself
+        response = current_app.response_class(mimetype=mimetype)
+        target = ACCEL_PREFIX + quote(filename) if UPLOAD_OFFLOAD == 'x-accel-redirect' else path
+        response.headers[OFFLOAD_HEADERS[UPLOAD_OFFLOAD]] = target
+    else:
+        stat = os.stat(path)
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            etag=_upload_etag(filename, stat),
+            last_modified=stat.st_mtime,
+            conditional=True
+        )
+        response.accept_ranges = 'bytes'
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -3,114 +3,99 @@ import sys
 # DON'T CHANGE THIS PATH
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
-from src.routes.user import user_bp
-from src.routes.product import product_bp
-from src.routes.admin import admin_bp
+from src.database import configure_database, install_pragmas
 
 def create_app():
-    app = Flask(__name__, static_folder='static', static_url_path='')
+    # Creating the app does not touch the database: tables, migrations
+    # and seed data are set up with the CLI commands in src/commands.py
+    # (flask --app src.main init-db)
+    from src.commands import register_commands
+    from src.routes.user import user_bp
+    from src.routes.product import product_bp
+    from src.routes.admin import admin_bp
+    from src.routes.catalog import catalog_bp
+    from src.routes.bootstrap import bootstrap_bp
+    from src.routes.bulk import bulk_bp
+    from src.routes.changes import changes_bp
+    from src.routes.events import events_bp
+    from src.static_files import build_index, send_static
+    from src.images import send_upload
+    from src.cache import catalog_cache
+    from src.metrics import init_metrics
+    from src.snapshots import init_snapshots
+    
+    # The frontend build in src/static is served by serve() below from an
+    # index built at startup, not by Flask's static route
+    app = Flask(__name__, static_folder=None)
     
     # Enable CORS for all routes
     CORS(app, origins='*')
     
     # Configuration
     app.config['SECRET_KEY'] = 'your-secret-key-here'
-    # Use instance folder for database to ensure persistence
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///manyar.db'
+    # DATABASE_URL, pool sizing and SQLite pragmas come from the environment
+    # (see src/database.py); the default SQLite file is in the instance folder
+    configure_database(app)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     
     # Initialize database
     db.init_app(app)
+    with app.app_context():
+        install_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        # Product snapshots are built by the commits that clear them
+        init_snapshots(db.engine)
+        # Request / SQL instrumentation and GET /api/metrics
+        init_metrics(app, db.engine)
     
     # Register blueprints
     app.register_blueprint(user_bp, url_prefix='/api')
     app.register_blueprint(product_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(catalog_bp, url_prefix='/api')
+    app.register_blueprint(bootstrap_bp, url_prefix='/api')
+    app.register_blueprint(bulk_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    register_commands(app)
+    
+    # Catalog cache invalidations reach the other worker processes
+    catalog_cache.share(os.path.join(app.instance_path, 'catalog.version'))
     
-    # Serve uploaded files
+    # Serve uploaded files (immutable; see src/images.py)
     @app.route('/uploads/<filename>')
     def uploaded_file(filename):
-        return send_from_directory('src/static/uploads', filename)
+        return send_upload(filename)
     
-    # Create tables and initialize data
-    with app.app_context():
-        db.create_all()
-        
-        # Import models to ensure they're registered
-        from src.models.product import Category, Product, ContactMessage, Admin
-        from src.models.product_image import ProductImage
+    # Index the frontend build; precompressed siblings written by
+    # `flask build-static` are picked up if they are current
+    app.extensions['static_index'] = build_index(precompress=False)
+    
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_index = app.extensions['static_index']
         
-        # Initialize default categories if they don't exist
-        if Category.query.count() == 0:
-            categories = [
-                {
-                    'name_ar': 'خدمات تقنية متكاملة',
-                    'name_en': 'Integrated Technical Services',
-                    'description_ar': 'صيانة حواسيب، خدمات برمجية، تركيب شبكات، ودعم فني متخصص',
-                    'description_en': 'Computer maintenance, software services, network installation, and specialized technical support',
-                    'icon': 'wrench',
-                    'whatsapp_link': 'https://wa.me/message/HWIIVWSQTBZXM1',
-                    'phone_number': '+963947993132'
-                },
-                {
-                    'name_ar': 'بيع وشراء الحواسيب',
-                    'name_en': 'Computer Sales & Purchase',
-                    'description_ar': 'أجهزة جديدة ومستعملة، شاشات، طابعات، لوحات مفاتيح وإكسسوارات',
-                    'description_en': 'New and used devices, monitors, printers, keyboards and accessories',
-                    'icon': 'computer',
-                    'whatsapp_link': 'https://wa.me/message/HWIIVWSQTBZXM1',
-                    'phone_number': '+963947993132'
-                },
-                {
-                    'name_ar': 'خدمات الطباعة والقرطاسية',
-                    'name_en': 'Printing & Stationery Services',
-                    'description_ar': 'طباعة أبحاث، دفاتر، أطروحات، تصوير ملخصات وبيع قرطاسية جامعية',
-                    'description_en': 'Research printing, notebooks, theses, summary copying and university stationery sales',
-                    'icon': 'printer',
-                    'whatsapp_link': 'https://wa.me/963969597967',
-                    'phone_number': '+963969597967'
-                },
-                {
-                    'name_ar': 'مواد التجميل والعناية',
-                    'name_en': 'Beauty & Care Products',
-                    'description_ar': 'منتجات عناية أصلية، ماركات موثوقة للبشرة والشعر والعطورات',
-                    'description_en': 'Original care products, trusted brands for skin, hair and perfumes',
-                    'icon': 'sparkles',
-                    'whatsapp_link': 'https://wa.me/963936086895',
-                    'phone_number': '+963936086895'
-                }
-            ]
-            
-            for cat_data in categories:
-                category = Category(**cat_data)
-                db.session.add(category)
-            
-            db.session.commit()
+        # Unknown paths are client-side routes and get the SPA shell
+        entry = static_index.get(path) if path != "" else None
+        if entry is None:
+            entry = static_index.get('index.html')
+            if entry is None:
+                return "index.html not found", 404
+        return send_static(entry)
     
     return app
 
 app = create_app()
 
 if __name__ == '__main__':
+    # The development server sets up the database itself, so a fresh
+    # checkout still runs with `python src/main.py`
+    from src.commands import init_database
+    
+    with app.app_context():
+        init_database()
     app.run(host='0.0.0.0', port=5000, debug=True)
-
-@app.route('/', defaults={'path': ''}) 
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
@@ -0,0 +1,322 @@
+import cProfile
+import fcntl
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from flask import abort, g, has_request_context, jsonify, request, session, Response
+
+# Request instrumentation, exposed at GET /api/metrics in the Prometheus
+# text format:
+#
+#   http_requests_total{endpoint,method,status}      counter
+#   http_request_duration_seconds{endpoint,method}   histogram
+#   http_response_size_bytes{endpoint,method}        summary (sum / count)
+#   db_statements_per_request{endpoint}              histogram
+#   db_statements_total{endpoint}                    counter
+#   db_statement_seconds_total{endpoint}             counter
+#
+# endpoint is the URL rule (/api/products/<int:product_id>), so the number
+# of series stays bounded. Statements slower than SLOW_QUERY_MS are logged
+# with their endpoint.
+#
+# Environment:
+#   SLOW_QUERY_MS        default 100
+#   METRICS_TOKEN        scrapers send "Authorization: Bearer <token>"; without
+#                        it /api/metrics is only open to a logged-in admin
+#   METRICS_DIR          shared folder for multi-process servers (set by
+#                        gunicorn.conf.py): each worker writes its numbers
+#                        there and /api/metrics adds them all up
+#   PROFILE_SAMPLE_RATE  fraction of requests to run under cProfile (default 0, off)
+#   PROFILE_SLOW_MS      only profiles of requests slower than this are kept (default 500)
+#   PROFILE_DIR          where .prof files go (default instance/profiles)
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+FLUSH_INTERVAL = 1.0
+ARCHIVE = 'archive.json'
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by endpoint, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency', DURATION_BUCKETS),
+    'http_response_size_bytes': ('summary', 'Response body size', None),
+    'db_statements_per_request': ('histogram', 'SQL statements run by one request', STATEMENT_BUCKETS),
+    'db_statements_total': ('counter', 'SQL statements run', None),
+    'db_statement_seconds_total': ('counter', 'Time spent in SQL statements', None),
+}
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+settings = {}
+
+class Registry:
+    def __init__(self):
+        self.values = defaultdict(float)     # (name, labels) -> value
+        self.histograms = {}                 # (name, labels) -> [bucket counts..., sum, count]
+        self.shared_dir = None
+        self._last_flush = 0.0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self.values[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            key = (name, labels)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'values': [[name, list(labels), value] for (name, labels), value in self.values.items()],
+                'histograms': [[name, list(labels), list(h)] for (name, labels), h in self.histograms.items()],
+            }
+
+    # Multi-process servers: every worker keeps its own registry and writes
+    # a snapshot to <shared_dir>/<pid>.json; a worker that exits folds its
+    # numbers into archive.json so totals survive worker recycling
+
+    def share(self, path):
+        # The folder is created by the first flush
+        self.shared_dir = path
+
+    def _path(self, pid=None):
+        return os.path.join(self.shared_dir, f'{pid or os.getpid()}.json')
+
+    def flush(self, force=False):
+        # Writes at most once per FLUSH_INTERVAL; numbers recorded in between
+        # are written by a timer at the end of the interval
+        if self.shared_dir is None:
+            return
+        now = time.monotonic()
+        wait = FLUSH_INTERVAL - (now - self._last_flush)
+        if not force and wait > 0:
+            with self._lock:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self._timed_flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return
+        self._last_flush = now
+        os.makedirs(self.shared_dir, exist_ok=True)
+        path = self._path()
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush(force=True)
+
+    def retire(self):
+        # Called from gunicorn's worker_exit hook
+        if self.shared_dir is None:
+            return
+        archive = os.path.join(self.shared_dir, ARCHIVE)
+        os.makedirs(self.shared_dir, exist_ok=True)
+        with open(os.path.join(self.shared_dir, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            snapshots = [self.snapshot()]
+            if os.path.exists(archive):
+                with open(archive) as f:
+                    snapshots.append(json.load(f))
+            tmp_path = f'{archive}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(merge(snapshots), f)
+            os.replace(tmp_path, archive)
+            try:
+                os.remove(self._path())
+            except FileNotFoundError:
+                pass
+
+    def collect(self):
+        if self.shared_dir is None:
+            return self.snapshot()
+        self.flush(force=True)
+        snapshots = []
+        for name in os.listdir(self.shared_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name)) as f:
+                    snapshots.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue  # retired or being replaced
+        return merge(snapshots)
+
+registry = Registry()
+
+def merge(snapshots):
+    values, histograms = defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['values']:
+            values[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, counts in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], counts)]
+            else:
+                histograms[key] = list(counts)
+    return {
+        'values': [[name, list(labels), value] for (name, labels), value in values.items()],
+        'histograms': [[name, list(labels), counts] for (name, labels), counts in histograms.items()],
+    }
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def render(snapshot):
+    lines_by_metric = defaultdict(list)
+    for name, labels, value in sorted(snapshot['values']):
+        # Summaries are stored as their _sum and _count series
+        metric = name if name in METRICS else name.rsplit('_', 1)[0]
+        lines_by_metric[metric].append(f'{name}{_labels(labels)} {_number(value)}')
+    for name, labels, counts in sorted(snapshot['histograms']):
+        buckets = METRICS[name][2]
+        lines = lines_by_metric[name]
+        for bound, count in zip(buckets, counts):
+            lines.append(f'{name}_bucket{_labels(labels, [("le", _number(float(bound)))])} {count}')
+        lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {counts[-1]}')
+        lines.append(f'{name}_sum{_labels(labels)} {_number(counts[-2])}')
+        lines.append(f'{name}_count{_labels(labels)} {counts[-1]}')
+
+    output = []
+    for name, (kind, help_text, _) in METRICS.items():
+        if name not in lines_by_metric:
+            continue
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {kind}')
+        output.extend(lines_by_metric[name])
+    return '\n'.join(output) + '\n'
+
+def _endpoint():
+    rule = request.url_rule
+    return rule.rule if rule is not None else '<unmatched>'
+
+# SQLAlchemy engine events
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    endpoint = _endpoint() if has_request_context() else None
+
+    if endpoint is not None and 'metrics' in g:
+        g.metrics['statements'] += 1
+        g.metrics['statement_seconds'] += elapsed
+
+    if elapsed * 1000 >= settings['slow_query_ms']:
+        logger.warning(
+            'Slow query (%.1f ms) on %s: %s',
+            elapsed * 1000, endpoint or '<no request>', re.sub(r'\s+', ' ', statement)[:1000]
+        )
+
+# Flask request hooks
+
+def _before_request():
+    g.metrics = {'start': time.perf_counter(), 'statements': 0, 'statement_seconds': 0.0, 'profiler': None}
+
+    if settings['profile_sample_rate'] and random.random() < settings['profile_sample_rate']:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g.metrics['profiler'] = profiler
+        except ValueError:
+            pass  # another profiler is already active on this thread
+
+def _after_request(response):
+    metrics = g.pop('metrics', None)
+    if metrics is None:
+        return response
+
+    elapsed = time.perf_counter() - metrics['start']
+    endpoint, method = _endpoint(), request.method
+    labels = (('endpoint', endpoint), ('method', method))
+
+    registry.inc('http_requests_total', labels + (('status', str(response.status_code)),))
+    registry.observe('http_request_duration_seconds', labels, elapsed)
+    # Streamed responses have no length up front and are not counted
+    if response.content_length is not None:
+        registry.inc('http_response_size_bytes_sum', labels, response.content_length)
+        registry.inc('http_response_size_bytes_count', labels)
+    registry.observe('db_statements_per_request', (('endpoint', endpoint),), metrics['statements'])
+    registry.inc('db_statements_total', (('endpoint', endpoint),), metrics['statements'])
+    registry.inc('db_statement_seconds_total', (('endpoint', endpoint),), metrics['statement_seconds'])
+
+    if metrics['profiler'] is not None:
+        _save_profile(metrics['profiler'], endpoint, elapsed)
+    registry.flush()
+    return response
+
+def _save_profile(profiler, endpoint, elapsed):
+    profiler.disable()
+    if elapsed * 1000 < settings['profile_slow_ms']:
+        return
+    folder = settings['profile_dir']
+    os.makedirs(folder, exist_ok=True)
+    name = re.sub(r'[^A-Za-z0-9]+', '_', f'{request.method} {endpoint}').strip('_')
+    profiler.dump_stats(os.path.join(folder, f'{time.strftime("%Y%m%d-%H%M%S")}-{name}-{elapsed * 1000:.0f}ms.prof'))
+
+def metrics_view():
+    # Endpoint names and timings are not public: a scraper with the token
+    # or a logged-in admin, anyone else gets a 404 (401 once a token is set)
+    token = settings['token']
+    if not (token and request.headers.get('Authorization') == f'Bearer {token}') and 'admin_id' not in session:
+        if not token:
+            abort(404)
+        return jsonify({'error': 'Authentication required'}), 401
+    return Response(render(registry.collect()), mimetype='text/plain; version=0.0.4')
+
+def init_metrics(app, engine):
+    from sqlalchemy import event
+
+    settings.update({
+        'slow_query_ms': _env_float('SLOW_QUERY_MS', 100),
+        'token': os.environ.get('METRICS_TOKEN'),
+        'profile_sample_rate': _env_float('PROFILE_SAMPLE_RATE', 0),
+        'profile_slow_ms': _env_float('PROFILE_SLOW_MS', 500),
+        'profile_dir': os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'),
+    })
+    if os.environ.get('METRICS_DIR'):
+        registry.share(os.environ['METRICS_DIR'])
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_view)
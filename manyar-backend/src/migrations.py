@@ -0,0 +1,207 @@
+from datetime import datetime
+from src.models.user import db
+
+# Versioned schema migrations for databases created before a change to the
+# models. db.create_all() only creates missing tables, so anything added to
+# an existing table (columns, indexes, triggers...) needs a step here.
+#
+# Steps run in order and must be idempotent: on a fresh database
+# create_all() has usually built the objects already. Append new steps to
+# MIGRATIONS; never edit or reorder ones that have shipped.
+
+def add_column(conn, table, column, ddl):
+    columns = {col['name'] for col in db.inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}')
+
+def rebuild_table(conn, table):
+    # SQLite cannot change the constraints of an existing table: copy the
+    # rows into a new table built from the current model and swap the two.
+    # Indexes are recreated here; triggers on the table are lost and have
+    # to be recreated by the caller. Runs with foreign keys off (upgrade()).
+    from sqlalchemy.schema import CreateTable
+
+    old_columns = {col['name'] for col in db.inspect(conn).get_columns(table.name)}
+    # Generated columns are computed by the new table, not copied
+    columns = ', '.join(col.name for col in table.columns if col.name in old_columns and col.computed is None)
+    new_name = f'{table.name}_new'
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+
+    conn.exec_driver_sql(f'DROP TABLE IF EXISTS {new_name}')
+    conn.exec_driver_sql(ddl.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {new_name} ', 1))
+    conn.exec_driver_sql(f'INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}')
+    conn.exec_driver_sql(f'DROP TABLE {table.name}')
+    conn.exec_driver_sql(f'ALTER TABLE {new_name} RENAME TO {table.name}')
+    for index in table.indexes:
+        index.create(conn)
+
+def _0001_product_phone_number(conn):
+    # Databases created before the per-product contact number was added
+    add_column(conn, 'product', 'phone_number', 'VARCHAR(20)')
+
+def _0002_listing_indexes(conn):
+    statements = [
+        'CREATE INDEX IF NOT EXISTS ix_product_category_id ON product (category_id)',
+        'CREATE INDEX IF NOT EXISTS ix_product_active_created ON product (is_active, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_product_active_category_created ON product (is_active, category_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_product_active_featured_created ON product (is_active, is_featured, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_product_image_product_sort ON product_image (product_id, sort_order)',
+        'CREATE INDEX IF NOT EXISTS ix_contact_message_created ON contact_message (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_contact_message_read_created ON contact_message (is_read, created_at)',
+    ]
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+def _0003_product_search(conn):
+    from src.search import create_index, rebuild_index
+
+    if conn.dialect.name != 'sqlite':
+        return
+    create_index(conn)
+    rebuild_index(conn)
+
+def _0004_stat_counters(conn):
+    from src.models.stats import StatCounter
+    from src.stats import create_triggers, rebuild_counters
+
+    if conn.dialect.name != 'sqlite':
+        return
+    StatCounter.__table__.create(conn, checkfirst=True)
+    create_triggers(conn)
+    rebuild_counters(conn)
+
+def _0005_cascade_deletes(conn):
+    # Products and their images are deleted by the database along with
+    # their category / product (ON DELETE CASCADE) instead of being loaded
+    # and deleted one by one by the ORM
+    from sqlalchemy.schema import AddConstraint
+    from src.models.product import Product
+    from src.models.product_image import ProductImage
+    from src.stats import create_triggers, rebuild_counters
+
+    def cascades(table):
+        foreign_keys = db.inspect(conn).get_foreign_keys(table.name)
+        return all(fk['options'].get('ondelete', '').upper() == 'CASCADE' for fk in foreign_keys)
+
+    tables = [table for table in (Product.__table__, ProductImage.__table__) if not cascades(table)]
+    if not tables:
+        return
+
+    # Rows the old schema let through would violate the new constraints
+    conn.exec_driver_sql('DELETE FROM product WHERE category_id NOT IN (SELECT id FROM category)')
+    conn.exec_driver_sql('DELETE FROM product_image WHERE product_id NOT IN (SELECT id FROM product)')
+
+    if conn.dialect.name != 'sqlite':
+        for table in tables:
+            for fk in db.inspect(conn).get_foreign_keys(table.name):
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} DROP CONSTRAINT {fk["name"]}')
+            for constraint in table.foreign_key_constraints:
+                conn.execute(AddConstraint(constraint))
+        return
+
+    for table in tables:
+        rebuild_table(conn, table)
+    create_triggers(conn)
+    conn.exec_driver_sql('DELETE FROM product_search WHERE rowid NOT IN (SELECT id FROM product)')
+    rebuild_counters(conn)
+
+    violations = conn.exec_driver_sql('PRAGMA foreign_key_check').fetchall()
+    if violations:
+        raise RuntimeError(f'Foreign key violations after rebuilding tables: {violations[:10]}')
+
+def _0006_product_discount(conn):
+    # discount_percentage used to be computed in Python by Product.to_dict()
+    from sqlalchemy.schema import CreateColumn
+    from src.models.product import Product
+    from src.stats import create_triggers
+
+    table = Product.__table__
+    columns = {col['name'] for col in db.inspect(conn).get_columns('product')}
+    if 'discount_percentage' not in columns:
+        if conn.dialect.name == 'sqlite':
+            # ALTER TABLE cannot add a stored generated column
+            rebuild_table(conn, table)
+            create_triggers(conn)
+        else:
+            column = CreateColumn(table.c.discount_percentage).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f'ALTER TABLE product ADD COLUMN {column}')
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+def _0007_change_log(conn):
+    from src.models.changes import ChangeLog, ChangeLogHorizon
+    from src.changes import backfill, create_triggers
+
+    if conn.dialect.name != 'sqlite':
+        return
+    ChangeLog.__table__.create(conn, checkfirst=True)
+    ChangeLogHorizon.__table__.create(conn, checkfirst=True)
+    create_triggers(conn)
+    backfill(conn)
+
+def _0008_product_snapshots(conn):
+    from src.models.snapshot import ProductSnapshot
+    from src.snapshots import backfill, create_triggers
+
+    if conn.dialect.name != 'sqlite':
+        return
+    ProductSnapshot.__table__.create(conn, checkfirst=True)
+    create_triggers(conn)
+    backfill(conn)
+
+def _0009_pending_snapshots(conn):
+    from src.models.snapshot import ProductSnapshot
+
+    if conn.dialect.name != 'sqlite':
+        return
+    for index in ProductSnapshot.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+MIGRATIONS = [
+    _0001_product_phone_number,
+    _0002_listing_indexes,
+    _0003_product_search,
+    _0004_stat_counters,
+    _0005_cascade_deletes,
+    _0006_product_discount,
+    _0007_change_log,
+    _0008_product_snapshots,
+    _0009_pending_snapshots,
+]
+
+def current_version(conn):
+    conn.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS schema_version ('
+        'version INTEGER PRIMARY KEY, applied_at TIMESTAMP NOT NULL)'
+    )
+    return conn.exec_driver_sql('SELECT MAX(version) FROM schema_version').scalar() or 0
+
+def upgrade(engine=None):
+    engine = engine or db.engine
+    applied = []
+
+    with engine.connect() as conn:
+        # Rebuilding a table (rebuild_table()) needs foreign key enforcement
+        # off, and SQLite only lets it be switched outside a transaction
+        sqlite = conn.dialect.name == 'sqlite'
+        if sqlite:
+            conn.exec_driver_sql('PRAGMA foreign_keys = OFF')
+            conn.commit()
+        try:
+            with conn.begin():
+                version = current_version(conn)
+                for number, migration in enumerate(MIGRATIONS, start=1):
+                    if number <= version:
+                        continue
+                    migration(conn)
+                    conn.execute(
+                        db.text('INSERT INTO schema_version (version, applied_at) VALUES (:version, :applied_at)'),
+                        {'version': number, 'applied_at': datetime.utcnow()}
+                    )
+                    applied.append(migration.__name__)
+        finally:
+            if sqlite:
+                conn.exec_driver_sql('PRAGMA foreign_keys = ON')
+                conn.commit()
+
+    return applied
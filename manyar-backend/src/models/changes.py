@@ -0,0 +1,23 @@
+from src.models.user import db
+
+class ChangeLog(db.Model):
+    # Written by SQLite triggers (see src/changes.py), never by the app. One
+    # row per category / product / image: every write replaces the entity's
+    # row with a new, higher id, which is the token clients sync from
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('entity', 'entity_id', name='uq_change_log_entity'),
+        # Ids are never reused, even after the newest row is replaced
+        {'sqlite_autoincrement': True},
+    )
+
+class ChangeLogHorizon(db.Model):
+    # Highest change id whose tombstone has been pruned; older tokens have
+    # to sync from scratch
+    id = db.Column(db.Integer, primary_key=True)
+    up_to = db.Column(db.Integer, nullable=False, default=0)
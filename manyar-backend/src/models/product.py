@@ -13,10 +13,19 @@ class Category(db.Model):
     phone_number = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    products = db.relationship('Product', backref='category', lazy=True, cascade='all, delete-orphan')
+    # Relationships. Deleting a category deletes its products (and their
+    # images) in the database through ON DELETE CASCADE, without loading them
+    products = db.relationship('Product', backref='category', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
-    def to_dict(self):
+    def count_products(self):
+        return db.session.query(db.func.count(Product.id)).filter(Product.category_id == self.id).scalar()
+    
+    def to_dict(self, products_count=None):
+        # products_count is normally supplied by the batched serializers;
+        # fall back to an aggregate instead of loading self.products
+        if products_count is None:
+            products_count = self.count_products()
+        
         return {
             'id': self.id,
             'name_ar': self.name_ar,
@@ -27,7 +36,7 @@ class Category(db.Model):
             'whatsapp_link': self.whatsapp_link,
             'phone_number': self.phone_number,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'products_count': len(self.products)
+            'products_count': products_count
         }
 
 class Product(db.Model):
@@ -43,19 +52,44 @@ class Product(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     stock_quantity = db.Column(db.Integer, default=0)
     phone_number = db.Column(db.String(20)) # New field for product contact number
-    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Percent off original_price. A stored generated column, so the database
+    # keeps it current on every write and listings can filter / sort on it
+    discount_percentage = db.Column(db.Float, db.Computed(
+        'CASE WHEN price > 0 AND original_price > price '
+        'THEN ROUND(CAST((original_price - price) * 100 / original_price AS NUMERIC), 2) ELSE 0 END',
+        persisted=True
+    ))
+    
+    __table_args__ = (
+        db.Index('ix_product_category_id', 'category_id'),
+        db.Index('ix_product_active_created', 'is_active', 'created_at'),
+        db.Index('ix_product_active_category_created', 'is_active', 'category_id', 'created_at'),
+        db.Index('ix_product_active_featured_created', 'is_active', 'is_featured', 'created_at'),
+        # ?sort=price|-price|discount and ?min_price / max_price
+        db.Index('ix_product_active_price', 'is_active', 'price'),
+        db.Index('ix_product_active_category_price', 'is_active', 'category_id', 'price'),
+        db.Index('ix_product_active_discount', 'is_active', 'discount_percentage'),
+        db.Index('ix_product_active_category_discount', 'is_active', 'category_id', 'discount_percentage'),
+    )
     
     # Relationships
-    images = db.relationship('ProductImage', backref='product', lazy=True, cascade='all, delete-orphan', order_by='ProductImage.sort_order')
+    images = db.relationship('ProductImage', backref='product', lazy=True, cascade='all, delete-orphan', passive_deletes=True, order_by='ProductImage.sort_order')
     
-    def to_dict(self):
-        primary_image = next((img for img in self.images if img.is_primary), None)
-        if not primary_image and self.images:
-            primary_image = self.images[0]
-        
-        return {
+    def primary_image_url(self, images):
+        primary_image = next((img for img in images if img.is_primary), None)
+        if not primary_image and images:
+            primary_image = images[0]
+        return primary_image.image_url if primary_image else self.image_url
+    
+    def to_dict(self, images=None, category=None, include_images=True, include_category=True):
+        # images / category (an already serialized dict) can be preloaded by
+        # src.serializers to avoid lazy loading per product. The include_*
+        # flags leave relationships (and the image_url derived from the
+        # images) out of the result entirely.
+        data = {
             'id': self.id,
             'name_ar': self.name_ar,
             'name_en': self.name_en,
@@ -63,18 +97,28 @@ class Product(db.Model):
             'description_en': self.description_en,
             'price': self.price,
             'original_price': self.original_price,
-            'image_url': primary_image.image_url if primary_image else self.image_url,
-            'images': [img.to_dict() for img in self.images],
             'is_featured': self.is_featured,
             'is_active': self.is_active,
             'stock_quantity': self.stock_quantity,
             'phone_number': self.phone_number, # Include the new field
             'category_id': self.category_id,
-            'category': self.category.to_dict() if self.category else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'discount_percentage': round(((self.original_price - self.price) / self.original_price * 100), 2) if self.original_price and self.price and self.original_price > self.price else 0
+            'discount_percentage': self.discount_percentage
         }
+        
+        if include_images:
+            if images is None:
+                images = self.images
+            data['image_url'] = self.primary_image_url(images)
+            data['images'] = [img.to_dict() for img in images]
+        
+        if include_category:
+            if category is None and self.category:
+                category = self.category.to_dict()
+            data['category'] = category
+        
+        return data
 
 class ContactMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -84,6 +128,11 @@ class ContactMessage(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_contact_message_created', 'created_at'),
+        db.Index('ix_contact_message_read_created', 'is_read', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,21 +1,27 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from src.models.user import db
+from src.images import variant_urls
 
 class ProductImage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
     alt_text = db.Column(db.String(200))
     is_primary = db.Column(db.Boolean, default=False)
     sort_order = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_product_image_product_sort', 'product_id', 'sort_order'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
             'product_id': self.product_id,
             'image_url': self.image_url,
+            'variants': variant_urls(self.image_url),
             'alt_text': self.alt_text,
             'is_primary': self.is_primary,
             'sort_order': self.sort_order,
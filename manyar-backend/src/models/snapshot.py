@@ -0,0 +1,14 @@
+from src.models.user import db
+
+class ProductSnapshot(db.Model):
+    # Public JSON of a product, images included, category left out. Built
+    # by the app (see src/snapshots.py); SQLite triggers clear body and bump
+    # version on every write to the product or its images
+    __table_args__ = (
+        # The snapshots the next commit has to build
+        db.Index('ix_product_snapshot_pending', 'product_id', sqlite_where=db.text('body IS NULL')),
+    )
+
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    body = db.Column(db.Text)
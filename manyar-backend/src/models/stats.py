@@ -0,0 +1,6 @@
+from src.models.user import db
+
+class StatCounter(db.Model):
+    # Maintained by SQLite triggers (see src/stats.py), never written by the app
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
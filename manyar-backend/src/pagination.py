@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from src.models.user import db
+
+# Keyset (cursor) pagination, newest first by default. Unlike .paginate()
+# this never issues an OFFSET scan or a COUNT(*), so page N costs the same
+# as page 1. Rows are ordered by (key, id); the key column (created_at
+# unless given) must not be NULL for any row of the query. per_page is
+# kept within 1..MAX_PER_PAGE, as in the search endpoint.
+
+MAX_PER_PAGE = 100
+
+def encode_cursor(value, item_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, item_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor, key_type=datetime):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        value = datetime.fromisoformat(value) if key_type is datetime else key_type(value)
+        return value, int(item_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def keyset_paginate(query, model, cursor=None, per_page=20, with_total=False, key=None, descending=True):
+    key = model.created_at if key is None else key
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        value, item_id = decode_cursor(cursor, key.type.python_type)
+        position = db.tuple_(key, model.id)
+        after = db.tuple_(value, item_id)
+        query = query.filter(position < after if descending else position > after)
+
+    order = (key.desc(), model.id.desc()) if descending else (key.asc(), model.id.asc())
+    items = query.order_by(*order).limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(getattr(items[-1], key.key), items[-1].id) if has_next else None,
+        'has_next': has_next,
+        'per_page': per_page,
+        'total': total
+    }
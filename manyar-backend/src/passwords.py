@@ -0,0 +1,38 @@
+import os
+import threading
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password hashing with bounded concurrency. The hash is deliberately slow
+# (scrypt by default), so at most HASH_WORKERS hashes run at once per
+# process and at most HASH_QUEUE more requests wait for their turn;
+# anything beyond that is refused with HashingBusy straight away. The hash
+# runs on the request thread: this caps the CPU that logins can take, it
+# does not free the thread while hashing.
+#
+# Environment:
+#   HASH_WORKERS   default 2
+#   HASH_QUEUE     default 4
+
+class HashingBusy(Exception):
+    pass
+
+WORKERS = int(os.environ.get('HASH_WORKERS') or 2)
+QUEUE = int(os.environ.get('HASH_QUEUE') or 4)
+
+_admitted = threading.BoundedSemaphore(WORKERS + QUEUE)
+_running = threading.BoundedSemaphore(WORKERS)
+
+def _run(f, *args):
+    if not _admitted.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        with _running:
+            return f(*args)
+    finally:
+        _admitted.release()
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def hash_password(password):
+    return _run(generate_password_hash, password)
@@ -0,0 +1,145 @@
+import functools
+import os
+import random
+import sqlite3
+import threading
+import time
+from flask import current_app, jsonify, request, session
+
+# Token-bucket rate limiting for the endpoints that are expensive or easy
+# to abuse. Buckets live in a small SQLite file of their own (not the app
+# database), so every worker process of the server sees the same counts,
+# and checking one is a single UPSERT on a primary key.
+#
+# Each limit refills `rate` tokens per second up to `capacity`; a request
+# takes one token from every bucket it is keyed by (client IP, IP and
+# username...) in one transaction, or none at all when one of them is
+# empty, and is then rejected with 429 and Retry-After. The check runs
+# before the view, so rejected logins never reach the password hash.
+#
+# Login attempts per username are counted per client IP too: a bucket for
+# the username alone would let anyone lock the admin out by sending a few
+# wrong passwords a minute.
+#
+# The client IP is request.remote_addr: behind a reverse proxy, wrap the
+# app in werkzeug's ProxyFix so it is the real client address.
+#
+# Environment:
+#   RATE_LIMIT_DB        bucket file (default instance/ratelimit.db)
+#   RATE_LIMIT_ENABLED   set to 0 to turn every limit off
+
+LIMITS = {
+    # name: (capacity, refill per second)
+    'login_ip': (10, 10 / 60),
+    'login_user': (5, 5 / 60),
+    'change_password': (5, 5 / 60),
+    'contact_ip': (5, 5 / 600),
+}
+CLEANUP_PROBABILITY = 0.01
+
+TAKE_TOKEN = '''
+INSERT INTO bucket (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT(key) DO UPDATE SET
+    tokens = MIN(:capacity, tokens + (:now - updated) * :rate) - 1,
+    updated = :now
+WHERE MIN(:capacity, tokens + (:now - updated) * :rate) >= 1
+RETURNING tokens
+'''
+
+class RateLimiter:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # One connection per thread, in autocommit mode: every statement is
+        # its own transaction
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            with self._lock:
+                if not self._initialized:
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS bucket ('
+                        'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID'
+                    )
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets):
+        # buckets: (key, capacity, rate) triples. Takes a token from each of
+        # them and returns 0, or takes none and returns the seconds until
+        # all of them have one
+        conn = self._connection()
+        now = time.time()
+        retry_after = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for key, capacity, rate in buckets:
+                params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+                if conn.execute(TAKE_TOKEN, params).fetchone() is None:
+                    row = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+                    tokens = min(capacity, row[0] + (now - row[1]) * rate) if row else capacity
+                    retry_after = max(retry_after, (1 - tokens) / rate, 0.001)
+            conn.execute('ROLLBACK' if retry_after else 'COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        if not retry_after and random.random() < CLEANUP_PROBABILITY:
+            self.cleanup(now)
+        return retry_after
+
+    def cleanup(self, now):
+        # Buckets that have refilled completely hold no information
+        longest = max(capacity / rate for capacity, rate in LIMITS.values())
+        self._connection().execute('DELETE FROM bucket WHERE updated < ?', (now - longest,))
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            path = os.environ.get('RATE_LIMIT_DB') or os.path.join(current_app.instance_path, 'ratelimit.db')
+            _limiter = RateLimiter(path)
+        return _limiter
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+def login_keys():
+    data = request.get_json(silent=True) or {}
+    keys = [('login_ip', client_ip())]
+    if isinstance(data.get('username'), str) and data['username']:
+        keys.append(('login_user', f"{client_ip()}:{data['username'].strip().lower()}"))
+    return keys
+
+def change_password_keys():
+    return [('change_password', f'admin:{session.get("admin_id")}'), ('change_password', client_ip())]
+
+def contact_keys():
+    return [('contact_ip', client_ip())]
+
+def rate_limit(keys):
+    # keys() returns (limit name, key) pairs for the current request
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            if os.environ.get('RATE_LIMIT_ENABLED', '1') != '0':
+                retry_after = get_limiter().take([(f'{name}:{key}', *LIMITS[name]) for name, key in keys()])
+                if retry_after:
+                    response = jsonify({'error': 'Too many requests, try again later'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(int(retry_after) + 1)
+                    return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
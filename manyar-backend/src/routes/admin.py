@@ -1,11 +1,19 @@
 from flask import Blueprint, jsonify, request, session
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from src.models.product import Admin, db
+from src.passwords import HashingBusy, hash_password, verify_password
+from src.ratelimit import rate_limit, login_keys, change_password_keys
 import functools
 
 admin_bp = Blueprint('admin', __name__)
 
+@admin_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    response = jsonify({'error': 'Server busy, try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
 def login_required(f):
     @functools.wraps(f)
     def decorated_function(*args, **kwargs):
@@ -15,6 +23,7 @@ def login_required(f):
     return decorated_function
 
 @admin_bp.route('/auth/login', methods=['POST'])
+@rate_limit(login_keys)
 def login():
     data = request.json
     username = data.get('username')
@@ -25,7 +34,7 @@ def login():
     
     admin = Admin.query.filter_by(username=username, is_active=True).first()
     
-    if admin and check_password_hash(admin.password_hash, password):
+    if admin and verify_password(admin.password_hash, password):
         session['admin_id'] = admin.id
         admin.last_login = datetime.utcnow()
         db.session.commit()
@@ -55,6 +64,7 @@ def get_current_admin():
 
 @admin_bp.route('/auth/change-password', methods=['POST'])
 @login_required
+@rate_limit(change_password_keys)
 def change_password():
     data = request.json
     current_password = data.get('current_password')
@@ -65,13 +75,13 @@ def change_password():
     
     admin = Admin.query.get(session['admin_id'])
     
-    if not check_password_hash(admin.password_hash, current_password):
+    if not verify_password(admin.password_hash, current_password):
         return jsonify({'error': 'Current password is incorrect'}), 400
     
     if len(new_password) < 6:
         return jsonify({'error': 'New password must be at least 6 characters'}), 400
     
-    admin.password_hash = generate_password_hash(new_password)
+    admin.password_hash = hash_password(new_password)
     db.session.commit()
     
     return jsonify({'message': 'Password changed successfully'})
@@ -97,7 +107,7 @@ def create_admin():
     admin = Admin(
         username=data['username'],
         email=data['email'],
-        password_hash=generate_password_hash(data['password']),
+        password_hash=hash_password(data['password']),
         is_active=data.get('is_active', True)
     )
     
@@ -128,7 +138,7 @@ def update_admin(admin_id):
         admin.is_active = data['is_active']
     
     if 'password' in data and data['password']:
-        admin.password_hash = generate_password_hash(data['password'])
+        admin.password_hash = hash_password(data['password'])
     
     db.session.commit()
     return jsonify(admin.to_dict())
@@ -156,7 +166,7 @@ def init_admin():
     admin = Admin(
         username='admin',
         email='admin@manyar.com',
-        password_hash=generate_password_hash('admin123'),
+        password_hash=hash_password('admin123'),
         is_active=True
     )
     
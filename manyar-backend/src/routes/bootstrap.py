@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify, request
+from werkzeug.datastructures import MultiDict
+from src.models.product import Admin, Category
+from src.routes.admin import login_required
+from src.routes.product import list_products, list_contact_messages
+from src.cache import cached_response
+from src.stats import read_stats
+from src.serializers import serialize_categories, serialize_category, project_category
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+# Composite endpoints that return everything a page needs on load in one
+# round trip. Every section is built in the same request, so they share one
+# app context and one database session, and each section has exactly the
+# body of the standalone endpoint it replaces.
+
+DASHBOARD_SECTIONS = {
+    'stats': read_stats,
+    'categories': lambda: serialize_categories(Category.query.all()),
+    'products': lambda: list_products(MultiDict()),
+    'messages': lambda: list_contact_messages(MultiDict()),
+    'admins': lambda: [admin.to_dict() for admin in Admin.query.all()],
+}
+
+@bootstrap_bp.route('/admin/dashboard', methods=['GET'])
+@login_required
+def get_dashboard():
+    # ?sections=stats,categories limits the response to those sections
+    names = list(DASHBOARD_SECTIONS)
+    if request.args.get('sections'):
+        names = [name.strip() for name in request.args['sections'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({'error': f'Unknown section {unknown[0]}'}), 400
+
+    return jsonify({name: DASHBOARD_SECTIONS[name]() for name in names})
+
+@bootstrap_bp.route('/storefront/<int:category_id>', methods=['GET'])
+@cached_response
+def get_storefront(category_id):
+    # The category and its active products; takes the same paging and
+    # projection parameters as GET /products
+    category = Category.query.get_or_404(category_id)
+
+    try:
+        response = list_products(request.args, category_id=category.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response['category'] = project_category(serialize_category(category), request.args.get('lang'))
+    return jsonify(response)
@@ -0,0 +1,188 @@
+from flask import Blueprint, jsonify, request
+from src.models.product import Category, Product, ContactMessage, db
+from src.routes.admin import login_required
+from src.cache import invalidate_catalog
+from src.search import remove_products
+from src.events import publish
+
+bulk_bp = Blueprint('bulk', __name__)
+
+# Bulk admin operations. Each request is one set-based UPDATE or DELETE,
+# however many rows it selects; nothing is loaded into the session.
+# Images (and, for categories, products) go with the rows that own them
+# through ON DELETE CASCADE, and the stat_counter triggers fire for every
+# affected row, cascaded ones included.
+#
+#   PATCH /api/products/bulk          {"ids" | "category_id", "changes": {...}}
+#   POST  /api/products/bulk-delete   {"ids" | "category_id"}
+#   POST  /api/categories/bulk-delete {"ids"}
+#   PATCH /api/contact/bulk           {"ids", "is_read"}
+#   POST  /api/contact/bulk-delete    {"ids"}
+#
+# Product changes: is_active, is_featured, price, original_price and
+# stock_quantity set a value; price_change_percent (-10 for 10% off) and
+# stock_change (a positive or negative delta, floored at 0) adjust the
+# current one.
+
+MAX_IDS = 10000
+
+def parse_ids(data):
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids must be a non-empty list')
+    if len(ids) > MAX_IDS:
+        raise ValueError(f'At most {MAX_IDS} ids per request')
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+        raise ValueError('ids must be integers')
+    return ids
+
+def product_condition(data):
+    if 'ids' not in data and 'category_id' in data:
+        category_id = data['category_id']
+        if not isinstance(category_id, int) or isinstance(category_id, bool):
+            raise ValueError('category_id must be an integer')
+        return Product.category_id == category_id
+    return Product.id.in_(parse_ids(data))
+
+def parse_number(changes, field, minimum=None):
+    value = changes[field]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f'{field} must be a number')
+    if minimum is not None and value < minimum:
+        raise ValueError(f'{field} must be at least {minimum}')
+    return value
+
+def product_values(changes):
+    if not isinstance(changes, dict) or not changes:
+        raise ValueError('changes must be a non-empty object')
+    if 'price' in changes and 'price_change_percent' in changes:
+        raise ValueError('Give either price or price_change_percent')
+    if 'stock_quantity' in changes and 'stock_change' in changes:
+        raise ValueError('Give either stock_quantity or stock_change')
+
+    values = {}
+    for field, value in changes.items():
+        if field in ('is_active', 'is_featured'):
+            if not isinstance(value, bool):
+                raise ValueError(f'{field} must be true or false')
+            values[field] = value
+        elif field in ('price', 'original_price'):
+            values[field] = None if value is None else parse_number(changes, field, minimum=0)
+        elif field == 'price_change_percent':
+            factor = 1 + parse_number(changes, field, minimum=-100) / 100
+            values['price'] = db.func.round(Product.price * factor * 100) / 100
+        elif field == 'stock_quantity':
+            if not isinstance(parse_number(changes, field, minimum=0), int):
+                raise ValueError('stock_quantity must be an integer')
+            values[field] = value
+        elif field == 'stock_change':
+            if not isinstance(parse_number(changes, field), int):
+                raise ValueError('stock_change must be an integer')
+            stock = db.func.coalesce(Product.stock_quantity, 0) + value
+            values['stock_quantity'] = db.case((stock < 0, 0), else_=stock)
+        else:
+            raise ValueError(f'Unknown change: {field}')
+    return values
+
+def delete_products(condition):
+    # Used by the single-row delete routes as well
+    remove_products(db.select(Product.id).filter(condition))
+    return db.session.execute(
+        db.delete(Product).filter(condition), execution_options={'synchronize_session': False}
+    ).rowcount
+
+def delete_categories(category_ids):
+    remove_products(db.select(Product.id).filter(Product.category_id.in_(category_ids)))
+    return db.session.execute(
+        db.delete(Category).filter(Category.id.in_(category_ids)), execution_options={'synchronize_session': False}
+    ).rowcount
+
+@bulk_bp.route('/products/bulk', methods=['PATCH'])
+@login_required
+def bulk_update_products():
+    data = request.get_json(silent=True) or {}
+    try:
+        condition = product_condition(data)
+        values = product_values(data.get('changes'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    updated = db.session.execute(
+        db.update(Product).filter(condition).values(**values), execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    if updated:
+        invalidate_catalog()
+    return jsonify({'updated': updated})
+
+@bulk_bp.route('/products/bulk-delete', methods=['POST'])
+@login_required
+def bulk_delete_products():
+    data = request.get_json(silent=True) or {}
+    try:
+        condition = product_condition(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    deleted = delete_products(condition)
+    db.session.commit()
+    if deleted:
+        invalidate_catalog()
+    return jsonify({'deleted': deleted})
+
+@bulk_bp.route('/categories/bulk-delete', methods=['POST'])
+@login_required
+def bulk_delete_categories():
+    data = request.get_json(silent=True) or {}
+    try:
+        category_ids = parse_ids(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    deleted = delete_categories(category_ids)
+    db.session.commit()
+    if deleted:
+        invalidate_catalog()
+    return jsonify({'deleted': deleted})
+
+@bulk_bp.route('/contact/bulk', methods=['PATCH'])
+@login_required
+def bulk_update_contact_messages():
+    data = request.get_json(silent=True) or {}
+    try:
+        message_ids = parse_ids(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    is_read = data.get('is_read', True)
+    if not isinstance(is_read, bool):
+        return jsonify({'error': 'is_read must be true or false'}), 400
+
+    # Rows that already have the value are left alone (and not counted)
+    updated = db.session.execute(
+        db.update(ContactMessage)
+        .filter(ContactMessage.id.in_(message_ids), db.func.coalesce(ContactMessage.is_read, False) != is_read)
+        .values(is_read=is_read),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    if updated:
+        publish('contact_update', {'ids': message_ids, 'is_read': is_read})
+    return jsonify({'updated': updated})
+
+@bulk_bp.route('/contact/bulk-delete', methods=['POST'])
+@login_required
+def bulk_delete_contact_messages():
+    data = request.get_json(silent=True) or {}
+    try:
+        message_ids = parse_ids(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    deleted = db.session.execute(
+        db.delete(ContactMessage).filter(ContactMessage.id.in_(message_ids)),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    if deleted:
+        publish('contact_delete', {'ids': message_ids})
+    return jsonify({'deleted': deleted})
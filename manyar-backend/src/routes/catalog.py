@@ -0,0 +1,296 @@
+import csv
+import io
+import json
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from src.models.product import Category, Product, db
+from src.models.product_image import ProductImage
+from src.routes.admin import login_required
+from src.cache import invalidate_catalog
+from src.search import document, index_documents
+
+catalog_bp = Blueprint('catalog', __name__)
+
+# Bulk catalog import / export. Both directions stream: the import reads
+# the request body row by row and inserts in batched transactions, the
+# export pages through products by id and never holds more than one batch.
+#
+# Rows use the same fields as POST /api/products. The category is given
+# either as category_id or as category (English or Arabic name). Images
+# are a list of {image_url, alt_text, is_primary, sort_order} objects in
+# JSONL, or a '|' separated list of URLs in CSV.
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_MAX_CONTENT_LENGTH = 512 * 1024 * 1024  # 512MB
+
+EXPORT_FIELDS = [
+    'id', 'category_id', 'name_ar', 'name_en', 'description_ar', 'description_en',
+    'price', 'original_price', 'image_url', 'is_featured', 'is_active',
+    'stock_quantity', 'phone_number'
+]
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+def parse_bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+def parse_number(value, cast):
+    if value is None or value == '':
+        return None
+    return cast(value)
+
+def detect_format(filename, mimetype):
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt
+    if (filename or '').lower().endswith('.csv') or 'csv' in (mimetype or ''):
+        return 'csv'
+    return 'jsonl'
+
+class UnreadableLine(ValueError):
+    def __init__(self, line_number, reason):
+        super().__init__(reason)
+        self.line_number = line_number
+
+def decode_lines(stream):
+    # Line by line rather than through a TextIOWrapper, which decodes whole
+    # chunks: the lines before an invalid byte are still read, and the
+    # error knows its line number
+    for line_number, line in enumerate(stream, start=1):
+        try:
+            text = line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        except UnicodeDecodeError as e:
+            raise UnreadableLine(line_number, str(e))
+        yield text
+
+def read_rows(stream, fmt):
+    # Yields (line number, row, error) so one bad line doesn't stop the
+    # import. Input that cannot be decoded, or parsed as CSV, ends it with
+    # an error for the line where reading stopped
+    lines = decode_lines(stream)
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(lines)
+            for row in reader:
+                urls = [url.strip() for url in (row.get('images') or '').split('|') if url.strip()]
+                row['images'] = [{'image_url': url} for url in urls]
+                yield reader.line_num, row, None
+            return
+
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError('Expected a JSON object')
+            except ValueError as e:
+                yield line_number, None, str(e)
+                continue
+            yield line_number, row, None
+    except UnreadableLine as e:
+        yield e.line_number, None, f'Unreadable input: {e}'
+    except csv.Error as e:
+        yield reader.line_num, None, f'Unreadable input: {e}'
+
+def load_category_lookup():
+    lookup = {'ids': set(), 'names': {}}
+    for category_id, name_ar, name_en in db.session.execute(
+        db.select(Category.id, Category.name_ar, Category.name_en)
+    ).all():
+        lookup['ids'].add(category_id)
+        lookup['names'][name_en.strip().lower()] = category_id
+        lookup['names'][name_ar.strip()] = category_id
+    return lookup
+
+def resolve_category(row, lookup):
+    category_id = parse_number(row.get('category_id'), int)
+    if category_id is not None:
+        if category_id not in lookup['ids']:
+            raise ValueError(f'Unknown category_id {category_id}')
+        return category_id
+
+    name = (row.get('category') or '').strip()
+    category_id = lookup['names'].get(name.lower()) or lookup['names'].get(name)
+    if category_id is None:
+        raise ValueError(f'Unknown category {name!r}' if name else 'category_id or category is required')
+    return category_id
+
+def build_product(row, lookup):
+    name_ar = (row.get('name_ar') or '').strip()
+    name_en = (row.get('name_en') or '').strip()
+    if not name_ar or not name_en:
+        raise ValueError('name_ar and name_en are required')
+
+    product = {
+        'name_ar': name_ar,
+        'name_en': name_en,
+        'description_ar': row.get('description_ar') or None,
+        'description_en': row.get('description_en') or None,
+        'price': parse_number(row.get('price'), float),
+        'original_price': parse_number(row.get('original_price'), float),
+        'image_url': row.get('image_url') or None,
+        'is_featured': parse_bool(row.get('is_featured'), False),
+        'is_active': parse_bool(row.get('is_active'), True),
+        'stock_quantity': parse_number(row.get('stock_quantity'), int) or 0,
+        'phone_number': row.get('phone_number') or None,
+        'category_id': resolve_category(row, lookup)
+    }
+
+    images = []
+    for i, image_data in enumerate(row.get('images') or []):
+        if not image_data.get('image_url'):
+            raise ValueError(f'Image {i} has no image_url')
+        sort_order = parse_number(image_data.get('sort_order'), int)
+        images.append({
+            'image_url': image_data['image_url'],
+            'alt_text': image_data.get('alt_text'),
+            'is_primary': parse_bool(image_data.get('is_primary'), i == 0),
+            'sort_order': i if sort_order is None else sort_order
+        })
+    return product, images
+
+def flush_batch(batch):
+    try:
+        product_ids = db.session.execute(
+            db.insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [product for _, product, _ in batch]
+        ).scalars().all()
+
+        images = [
+            {**image, 'product_id': product_id}
+            for product_id, (_, _, product_images) in zip(product_ids, batch)
+            for image in product_images
+        ]
+        if images:
+            db.session.execute(db.insert(ProductImage), images)
+
+        index_documents([
+            document(product_id, product['name_ar'], product['name_en'], product['description_ar'], product['description_en'])
+            for product_id, (_, product, _) in zip(product_ids, batch)
+        ])
+
+        db.session.commit()
+        return len(batch), []
+    except Exception as e:
+        db.session.rollback()
+        return 0, [{'line': line_number, 'error': str(e)} for line_number, _, _ in batch]
+
+@catalog_bp.route('/admin/catalog/import', methods=['POST'])
+@login_required
+def import_catalog():
+    request.max_content_length = IMPORT_MAX_CONTENT_LENGTH
+
+    if 'file' in request.files:
+        upload = request.files['file']
+        stream, fmt = upload.stream, detect_format(upload.filename, upload.mimetype)
+    else:
+        stream, fmt = request.stream, detect_format(None, request.mimetype)
+
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'error': 'Format must be csv or jsonl'}), 400
+
+    lookup = load_category_lookup()
+    imported, failed, errors, batch = 0, 0, [], []
+
+    def record_errors(new_errors):
+        nonlocal failed
+        failed += len(new_errors)
+        errors.extend(new_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+    try:
+        # Rows read before unreadable input are still imported
+        for line_number, row, error in read_rows(stream, fmt):
+            if error is None:
+                try:
+                    product, images = build_product(row, lookup)
+                    batch.append((line_number, product, images))
+                except (ValueError, TypeError, AttributeError) as e:
+                    error = str(e)
+            if error is not None:
+                record_errors([{'line': line_number, 'error': error}])
+
+            if len(batch) >= BATCH_SIZE:
+                count, batch_errors = flush_batch(batch)
+                imported += count
+                record_errors(batch_errors)
+                batch = []
+
+        if batch:
+            count, batch_errors = flush_batch(batch)
+            imported += count
+            record_errors(batch_errors)
+    finally:
+        if imported:
+            invalidate_catalog()
+
+    return jsonify({
+        'imported': imported,
+        'failed': failed,
+        'errors': errors
+    })
+
+def export_batches():
+    columns = [getattr(Product, field) for field in EXPORT_FIELDS]
+    last_id = 0
+
+    while True:
+        rows = db.session.execute(
+            db.select(*columns).filter(Product.id > last_id).order_by(Product.id).limit(BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            return
+
+        images_by_product = {}
+        for image in db.session.execute(
+            db.select(ProductImage.product_id, ProductImage.image_url, ProductImage.alt_text,
+                      ProductImage.is_primary, ProductImage.sort_order)
+            .filter(ProductImage.product_id.between(rows[0]['id'], rows[-1]['id']))
+            .order_by(ProductImage.product_id, ProductImage.sort_order)
+        ).mappings():
+            images_by_product.setdefault(image['product_id'], []).append({
+                'image_url': image['image_url'],
+                'alt_text': image['alt_text'],
+                'is_primary': image['is_primary'],
+                'sort_order': image['sort_order']
+            })
+
+        yield [(dict(row), images_by_product.get(row['id'], [])) for row in rows]
+        last_id = rows[-1]['id']
+
+@catalog_bp.route('/admin/catalog/export', methods=['GET'])
+@login_required
+def export_catalog():
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'error': 'Format must be csv or jsonl'}), 400
+
+    def generate_jsonl():
+        for batch in export_batches():
+            yield ''.join(
+                json.dumps({**row, 'images': images}, ensure_ascii=False) + '\n'
+                for row, images in batch
+            )
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS + ['images'])
+        for batch in export_batches():
+            for row, images in batch:
+                writer.writerow([row[field] for field in EXPORT_FIELDS] + ['|'.join(image['image_url'] for image in images)])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if fmt == 'csv':
+        response = Response(stream_with_context(generate_csv()), mimetype='text/csv')
+    else:
+        response = Response(stream_with_context(generate_jsonl()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename=catalog.{fmt}'
+    return response
@@ -0,0 +1,63 @@
+from flask import Blueprint, jsonify, request
+from src.models.product import Category, Product
+from src.models.product_image import ProductImage
+from src.cache import cached_response
+from src.changes import TokenExpired, changes_available, read_changes
+from src.serializers import PRODUCT_SCALAR_FIELDS, parse_projection, serialize_categories, project_category, project_products
+
+changes_bp = Blueprint('changes', __name__)
+
+# GET /api/changes?since=<token>&limit=&lang=
+#
+# Categories, products and images created, updated or deleted after the
+# token (see src/changes.py), oldest change first. Start with since=0 for
+# the whole catalog, then poll with next_token; while has_more is true
+# there are further pages to fetch right away. Products carry the scalar
+# fields and image_url (their images are listed separately), inactive ones
+# included, so clients can drop them. A 410 means the token is too old:
+# sync again from 0.
+#
+# Responses are cached and carry an ETag like the other catalog reads, so
+# polling clients that are up to date mostly get a 304.
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+PLURALS = {'category': 'categories', 'product': 'products', 'image': 'images'}
+
+@changes_bp.route('/changes', methods=['GET'])
+@cached_response
+def get_changes():
+    if not changes_available():
+        return jsonify({'error': 'The change feed is not available on this database'}), 501
+
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    lang = request.args.get('lang')
+
+    try:
+        # Images are listed on their own, not inside the products
+        projection = parse_projection({'fields': ','.join(PRODUCT_SCALAR_FIELDS + ['image_url']), 'lang': lang})
+        rows, next_token, has_more = read_changes(request.args.get('since', ''), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except TokenExpired:
+        return jsonify({'error': 'Token expired, sync again from since=0', 'reset': True}), 410
+
+    changed = {entity: [] for entity in PLURALS}
+    deleted = {entity: [] for entity in PLURALS}
+    for entity, entity_id, is_deleted in rows:
+        (deleted if is_deleted else changed)[entity].append(entity_id)
+
+    # Rows deleted after the change log was read are left out here; their
+    # tombstones come with the next poll
+    categories = Category.query.filter(Category.id.in_(changed['category'])).all() if changed['category'] else []
+    products = Product.query.filter(Product.id.in_(changed['product'])).all() if changed['product'] else []
+    images = ProductImage.query.filter(ProductImage.id.in_(changed['image'])).all() if changed['image'] else []
+
+    return jsonify({
+        'categories': [project_category(category, lang) for category in serialize_categories(categories)],
+        'products': project_products(products, projection)[0],
+        'images': [image.to_dict() for image in images],
+        'deleted': {PLURALS[entity]: ids for entity, ids in deleted.items()},
+        'next_token': next_token,
+        'has_more': has_more
+    })
@@ -0,0 +1,75 @@
+import logging
+from flask import Blueprint, Response, current_app, jsonify, request
+from src.routes.admin import login_required
+from src.models.user import db
+from src.events import close_stream, get_log, open_stream, opening, poll_events, resume_point, streaming_supported
+from src.stats import read_stats
+
+events_bp = Blueprint('events', __name__)
+
+logger = logging.getLogger(__name__)
+
+# GET /api/admin/events
+#
+# Server-Sent Events stream for the admin panel (see src/events.py):
+#
+#   stats            dashboard numbers that changed (all of them first)
+#   contact          a new contact message
+#   contact_update   {"ids", "is_read"}
+#   contact_delete   {"ids"}
+#   catalog          categories or products changed
+#   reset            events were missed; reload everything
+#
+# EventSource sends Last-Event-ID when it reconnects; ?last_event_id= does
+# the same for clients that cannot set the header. Only served by the
+# gevent server in gunicorn_events.conf.py (or with EVENTS_THREADED=1);
+# anywhere else the stream would hold a request thread, and it answers 501.
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Keeps nginx from buffering the stream
+    'X-Accel-Buffering': 'no',
+}
+
+def stream_events(app, log, resume_id, reset, stats):
+    # Runs outside the request: the stats are read in an app context of
+    # their own, whose teardown hands the pooled connection back at once
+    def read_stats_now():
+        with app.app_context():
+            return read_stats()
+
+    yield opening(resume_id, reset, stats)
+    yield from poll_events(log, resume_id, stats, read_stats_now)
+
+@events_bp.route('/admin/events', methods=['GET'])
+@login_required
+def get_events():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    if not streaming_supported():
+        logger.error('GET /api/admin/events needs the gevent server in gunicorn_events.conf.py '
+                     '(or EVENTS_THREADED=1); refusing to hold a request thread per stream')
+        return jsonify({'error': 'Event streams are not served by this server'}), 501
+
+    if not open_stream():
+        return jsonify({'error': 'Too many open event streams'}), 503
+    try:
+        log = get_log()
+        resume_id, reset = resume_point(log, last_event_id)
+        stats = read_stats()
+        # The stream must not keep the request's session, and with it a
+        # pooled connection, for STREAM_SECONDS
+        db.session.remove()
+        response = Response(
+            stream_events(current_app._get_current_object(), log, resume_id, reset, stats),
+            mimetype='text/event-stream', headers=SSE_HEADERS
+        )
+    except BaseException:
+        close_stream()
+        raise
+    response.call_on_close(close_stream)
+    return response
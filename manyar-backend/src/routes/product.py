@@ -1,29 +1,30 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, abort, current_app, jsonify, request
 from src.models.product import Product, Category, ContactMessage, db
 from src.models.product_image import ProductImage
-from src.models.user import User
-import os
-from werkzeug.utils import secure_filename
-import uuid
+from src.pagination import keyset_paginate
+from src.cache import cached_response, invalidate_catalog
+from src.search import index_product, search_product_ids
+from src.stats import read_stats
+from src.serializers import (
+    serialize_categories, serialize_category, serialize_product,
+    parse_projection, apply_projection, project_products, project_category
+)
+from src.snapshots import listing_query, snapshot_products, snapshot_product_json, snapshots_available
+from src.images import ALLOWED_EXTENSIONS, InvalidImage, store_upload
+from src.ratelimit import rate_limit, contact_keys
+from src.contact_queue import get_queue
+from src.events import publish
+from src.routes.bulk import delete_products, delete_categories
 
 product_bp = Blueprint('product', __name__)
 
-UPLOAD_FOLDER = 'src/static/uploads'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def ensure_upload_folder():
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
-
 # File upload route
 @product_bp.route('/upload', methods=['POST'])
 def upload_file():
     try:
-        ensure_upload_folder()
-        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -32,27 +33,34 @@ def upload_file():
             return jsonify({'error': 'No file selected'}), 400
         
         if file and allowed_file(file.filename):
-            # Generate unique filename
-            filename = secure_filename(file.filename)
-            name, ext = os.path.splitext(filename)
-            unique_filename = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
-            
-            filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-            file.save(filepath)
-            
-            # Return the URL path
-            file_url = f"/uploads/{unique_filename}"
-            return jsonify({'file_url': file_url})
+            # Stored under its content hash; resized variants are generated in the background
+            ext = file.filename.rsplit('.', 1)[1].lower()
+            return jsonify(store_upload(file, ext))
         
         return jsonify({'error': 'Invalid file type'}), 400
+    except InvalidImage as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def with_products(response, products, projection):
+    # Adds the serialized products (and the side-loaded categories, if
+    # requested) to a listing response
+    if projection is None:
+        response['products'] = snapshot_products(products)
+    else:
+        response['products'], included = project_products(products, projection)
+        if included is not None:
+            response['included'] = included
+    return response
+
 # Category routes
 @product_bp.route('/categories', methods=['GET'])
+@cached_response
 def get_categories():
+    lang = request.args.get('lang')
     categories = Category.query.all()
-    return jsonify([category.to_dict() for category in categories])
+    return jsonify([project_category(category, lang) for category in serialize_categories(categories)])
 
 @product_bp.route('/categories', methods=['POST'])
 def create_category():
@@ -68,12 +76,14 @@ def create_category():
     )
     db.session.add(category)
     db.session.commit()
+    invalidate_catalog()
     return jsonify(category.to_dict()), 201
 
 @product_bp.route('/categories/<int:category_id>', methods=['GET'])
+@cached_response
 def get_category(category_id):
     category = Category.query.get_or_404(category_id)
-    return jsonify(category.to_dict())
+    return jsonify(project_category(serialize_category(category), request.args.get('lang')))
 
 @product_bp.route('/categories/<int:category_id>', methods=['PUT'])
 def update_category(category_id):
@@ -89,25 +99,49 @@ def update_category(category_id):
     category.phone_number = data.get('phone_number', category.phone_number)
     
     db.session.commit()
+    invalidate_catalog()
     return jsonify(category.to_dict())
 
 @product_bp.route('/categories/<int:category_id>', methods=['DELETE'])
 def delete_category(category_id):
+    # One DELETE; the database removes the products and images with it
     category = Category.query.get_or_404(category_id)
-    db.session.delete(category)
+    delete_categories([category.id])
     db.session.commit()
+    invalidate_catalog()
     return '', 204
 
 # Product routes
-@product_bp.route('/products', methods=['GET'])
-def get_products():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    category_id = request.args.get('category_id', type=int)
-    is_featured = request.args.get('is_featured', type=bool)
-    is_active = request.args.get('is_active', True, type=bool)
+# ?sort= values: (column, descending). Each has an (is_active, column) and
+# an (is_active, category_id, column) index
+PRODUCT_SORTS = {
+    'newest': (Product.created_at, True),
+    'price': (Product.price, False),
+    '-price': (Product.price, True),
+    'discount': (Product.discount_percentage, True),
+}
+
+def list_products(args, category_id=None):
+    # Body of GET /products, shared with the composite endpoints in
+    # routes/bootstrap.py. Raises ValueError for bad parameters.
+    page = args.get('page', 1, type=int)
+    per_page = args.get('per_page', 20, type=int)
+    category_id = category_id or args.get('category_id', type=int)
+    is_featured = args.get('is_featured', type=bool)
+    is_active = args.get('is_active', True, type=bool)
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    in_stock = args.get('in_stock')
+    sort = args.get('sort', 'newest')
+    
+    if sort not in PRODUCT_SORTS:
+        raise ValueError(f'sort must be one of {", ".join(PRODUCT_SORTS)}')
+    sort_key, descending = PRODUCT_SORTS[sort]
     
+    projection = parse_projection(args)
     query = Product.query.filter_by(is_active=is_active)
+    # The default representation is read from the product snapshots
+    query = listing_query(query) if projection is None else apply_projection(query, projection)
     
     if category_id:
         query = query.filter_by(category_id=category_id)
@@ -115,19 +149,96 @@ def get_products():
     if is_featured is not None:
         query = query.filter_by(is_featured=is_featured)
     
-    products = query.order_by(Product.created_at.desc()).paginate(
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    
+    if in_stock in ('true', '1'):
+        query = query.filter(Product.stock_quantity > 0)
+    elif in_stock in ('false', '0'):
+        query = query.filter(db.func.coalesce(Product.stock_quantity, 0) <= 0)
+    elif in_stock is not None:
+        raise ValueError('in_stock must be true or false')
+    
+    # Products without a price are left out of the price orderings
+    if sort_key is Product.price:
+        query = query.filter(Product.price.isnot(None))
+    
+    # Opt-in keyset pagination: ?cursor= (empty for the first page)
+    if 'cursor' in args:
+        result = keyset_paginate(
+            query, Product,
+            cursor=args.get('cursor'),
+            per_page=per_page,
+            with_total=args.get('include_total') == 'true',
+            key=sort_key,
+            descending=descending
+        )
+        
+        response = with_products({
+            'next_cursor': result['next_cursor'],
+            'has_next': result['has_next'],
+            'per_page': result['per_page']
+        }, result['items'], projection)
+        if result['total'] is not None:
+            response['total'] = result['total']
+        return response
+    
+    order = (sort_key.desc(), Product.id.desc()) if descending else (sort_key.asc(), Product.id.asc())
+    products = query.order_by(*order).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    return jsonify({
-        'products': [product.to_dict() for product in products.items],
+    return with_products({
         'total': products.total,
         'pages': products.pages,
         'current_page': page,
         'per_page': per_page,
         'has_next': products.has_next,
         'has_prev': products.has_prev
-    })
+    }, products.items, projection)
+
+@product_bp.route('/products', methods=['GET'])
+@cached_response
+def get_products():
+    try:
+        return jsonify(list_products(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@product_bp.route('/products/search', methods=['GET'])
+@cached_response
+def search_products():
+    q = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    
+    if not q:
+        return jsonify({'error': 'Search query required'}), 400
+    
+    try:
+        projection = parse_projection(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    ids, total = search_product_ids(q, page=page, per_page=per_page)
+    
+    # Keep the bm25 ranking order of the ids
+    query = Product.query.filter(Product.id.in_(ids))
+    query = listing_query(query) if projection is None else apply_projection(query, projection)
+    products_by_id = {product.id: product for product in query.all()} if ids else {}
+    products = [products_by_id[product_id] for product_id in ids if product_id in products_by_id]
+    
+    return jsonify(with_products({
+        'query': q,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'current_page': page,
+        'per_page': per_page,
+        'has_next': page * per_page < total,
+        'has_prev': page > 1
+    }, products, projection))
 
 @product_bp.route('/products', methods=['POST'])
 def create_product():
@@ -162,95 +273,220 @@ def create_product():
             )
             db.session.add(product_image)
         
+        index_product(product)
         db.session.commit()
+        invalidate_catalog()
         return jsonify(product.to_dict()), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @product_bp.route('/products/<int:product_id>', methods=['GET'])
+@cached_response
 def get_product(product_id):
-    product = Product.query.get_or_404(product_id)
-    return jsonify(product.to_dict())
+    try:
+        projection = parse_projection(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if projection is None and snapshots_available():
+        # Stitched from the stored snapshot and the category (src/snapshots.py)
+        body = snapshot_product_json(product_id)
+        if body is None:
+            abort(404)
+        return current_app.response_class(body, mimetype='application/json')
+    
+    product = apply_projection(Product.query, projection).get_or_404(product_id)
+    if projection is None:
+        return jsonify(serialize_product(product))
+    
+    # A single product has nothing to de-duplicate, so keep the category inline
+    if projection['side_load']:
+        projection = {**projection, 'fields': projection['fields'] | {'category'}, 'side_load': False}
+    return jsonify(project_products([product], projection)[0][0])
+
+PRODUCT_FIELDS = [
+    'name_ar', 'name_en', 'description_ar', 'description_en', 'price', 'original_price',
+    'image_url', 'is_featured', 'is_active', 'stock_quantity', 'phone_number', 'category_id'
+]
+SEARCH_FIELDS = {'name_ar', 'name_en', 'description_ar', 'description_en'}
+IMAGE_FIELDS = ['image_url', 'alt_text', 'is_primary', 'sort_order']
+
+def apply_product_fields(product, data):
+    changed = set()
+    for field in PRODUCT_FIELDS:
+        if field in data and getattr(product, field) != data[field]:
+            setattr(product, field, data[field])
+            changed.add(field)
+    return changed
+
+def sync_product_images(product, images_data):
+    # Reconcile the submitted list with the stored rows instead of
+    # replacing them, so unchanged images keep their ids. Rows are matched
+    # by id, then by image_url. Returns True if anything changed.
+    existing = ProductImage.query.filter_by(product_id=product.id).all()
+    by_id = {image.id: image for image in existing}
+    unmatched_by_url = {}
+    for image in existing:
+        unmatched_by_url.setdefault(image.image_url, []).append(image)
+    
+    kept, updates, inserts = set(), [], []
+    for i, image_data in enumerate(images_data):
+        wanted = {
+            'image_url': image_data.get('image_url'),
+            'alt_text': image_data.get('alt_text'),
+            'is_primary': image_data.get('is_primary', i == 0),
+            'sort_order': image_data.get('sort_order', i)
+        }
+        
+        image = by_id.get(image_data.get('id'))
+        if image is None or image.id in kept:
+            candidates = [c for c in unmatched_by_url.get(wanted['image_url'], []) if c.id not in kept]
+            image = candidates[0] if candidates else None
+        
+        if image is None:
+            inserts.append({**wanted, 'product_id': product.id})
+            continue
+        
+        kept.add(image.id)
+        if any(getattr(image, field) != wanted[field] for field in IMAGE_FIELDS):
+            updates.append({**wanted, 'id': image.id})
+    
+    removed = [image_id for image_id in by_id if image_id not in kept]
+    
+    if removed:
+        db.session.execute(db.delete(ProductImage).filter(ProductImage.id.in_(removed)))
+    if updates:
+        # One executemany UPDATE ... WHERE id = ? for every changed row
+        db.session.execute(db.update(ProductImage), updates)
+    if inserts:
+        db.session.execute(db.insert(ProductImage), inserts)
+    
+    if removed or updates or inserts:
+        db.session.expire(product, ['images'])
+        return True
+    return False
 
 @product_bp.route('/products/<int:product_id>', methods=['PUT'])
 def update_product(product_id):
+    product = Product.query.get_or_404(product_id)
     try:
-        product = Product.query.get_or_404(product_id)
         data = request.json
         
-        product.name_ar = data.get('name_ar', product.name_ar)
-        product.name_en = data.get('name_en', product.name_en)
-        product.description_ar = data.get('description_ar', product.description_ar)
-        product.description_en = data.get('description_en', product.description_en)
-        product.price = data.get('price', product.price)
-        product.original_price = data.get('original_price', product.original_price)
-        product.image_url = data.get('image_url', product.image_url)
-        product.is_featured = data.get('is_featured', product.is_featured)
-        product.is_active = data.get('is_active', product.is_active)
-        product.stock_quantity = data.get("stock_quantity", product.stock_quantity)
-        product.phone_number = data.get("phone_number", product.phone_number) # New field
-        product.category_id = data.get("category_id", product.category_id)
+        changed = apply_product_fields(product, data)
         
         # Handle images update
         if 'images' in data:
-            # Remove existing images
-            ProductImage.query.filter_by(product_id=product.id).delete()
-            
-            # Add new images
-            images_data = data.get('images', [])
-            for i, image_data in enumerate(images_data):
-                product_image = ProductImage(
-                    product_id=product.id,
-                    image_url=image_data.get('image_url'),
-                    alt_text=image_data.get('alt_text'),
-                    is_primary=image_data.get('is_primary', i == 0),
-                    sort_order=image_data.get('sort_order', i)
-                )
-                db.session.add(product_image)
+            sync_product_images(product, data.get('images') or [])
         
+        if changed & SEARCH_FIELDS:
+            index_product(product)
         db.session.commit()
+        invalidate_catalog()
         return jsonify(product.to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@product_bp.route('/products/<int:product_id>', methods=['PATCH'])
+def patch_product(product_id):
+    # Partial update: the response only carries images / category when
+    # the request changed them
+    product = Product.query.get_or_404(product_id)
+    try:
+        data = request.json
+        
+        changed = apply_product_fields(product, data)
+        images_changed = 'images' in data and sync_product_images(product, data.get('images') or [])
+        
+        if changed & SEARCH_FIELDS:
+            index_product(product)
+        db.session.commit()
+        if changed or images_changed:
+            invalidate_catalog()
+        
+        return jsonify(product.to_dict(
+            include_images=images_changed or 'image_url' in changed,
+            include_category='category_id' in changed
+        ))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @product_bp.route('/products/<int:product_id>', methods=['DELETE'])
 def delete_product(product_id):
     product = Product.query.get_or_404(product_id)
-    db.session.delete(product)
+    delete_products(Product.id == product.id)
     db.session.commit()
+    invalidate_catalog()
     return '', 204
 
 # Contact message routes
+CONTACT_FIELDS = {
+    # field: max length
+    'name': 100,
+    'email': 120,
+    'message': 5000,
+}
+
 @product_bp.route('/contact', methods=['POST'])
+@rate_limit(contact_keys)
 def create_contact_message():
-    data = request.json
-    message = ContactMessage(
-        name=data['name'],
-        email=data['email'],
-        message=data['message']
-    )
-    db.session.add(message)
-    db.session.commit()
-    return jsonify(message.to_dict()), 201
+    # Validated and queued; the message reaches contact_message a moment
+    # later in a batch (see src/contact_queue.py)
+    data = request.get_json(silent=True) or {}
+    fields = {}
+    for field, max_length in CONTACT_FIELDS.items():
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return jsonify({'error': f'{field} is required'}), 400
+        if len(value) > max_length:
+            return jsonify({'error': f'{field} is longer than {max_length} characters'}), 400
+        fields[field] = value.strip()
+    if '@' not in fields['email']:
+        return jsonify({'error': 'Invalid email'}), 400
+    
+    queue = get_queue()
+    queue.start(current_app._get_current_object())
+    queued = queue.enqueue(fields['name'], fields['email'], fields['message'])
+    return jsonify({'status': 'queued' if queued else 'duplicate'}), 202
 
-@product_bp.route('/contact', methods=['GET'])
-def get_contact_messages():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    is_read = request.args.get('is_read', type=bool)
+def list_contact_messages(args):
+    # Body of GET /contact, shared with the admin dashboard endpoint.
+    # Raises ValueError for an invalid cursor.
+    page = args.get('page', 1, type=int)
+    per_page = args.get('per_page', 20, type=int)
+    is_read = args.get('is_read', type=bool)
     
     query = ContactMessage.query
     
     if is_read is not None:
         query = query.filter_by(is_read=is_read)
     
+    # Opt-in keyset pagination: ?cursor= (empty for the first page)
+    if 'cursor' in args:
+        result = keyset_paginate(
+            query, ContactMessage,
+            cursor=args.get('cursor'),
+            per_page=per_page,
+            with_total=args.get('include_total') == 'true'
+        )
+        
+        response = {
+            'messages': [message.to_dict() for message in result['items']],
+            'next_cursor': result['next_cursor'],
+            'has_next': result['has_next'],
+            'per_page': result['per_page']
+        }
+        if result['total'] is not None:
+            response['total'] = result['total']
+        return response
+    
     messages = query.order_by(ContactMessage.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    return jsonify({
+    return {
         'messages': [message.to_dict() for message in messages.items],
         'total': messages.total,
         'pages': messages.pages,
@@ -258,7 +494,14 @@ def get_contact_messages():
         'per_page': per_page,
         'has_next': messages.has_next,
         'has_prev': messages.has_prev
-    })
+    }
+
+@product_bp.route('/contact', methods=['GET'])
+def get_contact_messages():
+    try:
+        return jsonify(list_contact_messages(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @product_bp.route('/contact/<int:message_id>', methods=['PUT'])
 def update_contact_message(message_id):
@@ -268,6 +511,7 @@ def update_contact_message(message_id):
     message.is_read = data.get('is_read', message.is_read)
     
     db.session.commit()
+    publish('contact_update', {'ids': [message.id], 'is_read': message.is_read})
     return jsonify(message.to_dict())
 
 @product_bp.route('/contact/<int:message_id>', methods=['DELETE'])
@@ -275,24 +519,10 @@ def delete_contact_message(message_id):
     message = ContactMessage.query.get_or_404(message_id)
     db.session.delete(message)
     db.session.commit()
+    publish('contact_delete', {'ids': [message_id]})
     return '', 204
 
 # Statistics routes
 @product_bp.route('/stats', methods=['GET'])
 def get_stats():
-    total_products = Product.query.count()
-    active_products = Product.query.filter_by(is_active=True).count()
-    featured_products = Product.query.filter_by(is_featured=True).count()
-    total_categories = Category.query.count()
-    unread_messages = ContactMessage.query.filter_by(is_read=False).count()
-    total_messages = ContactMessage.query.count()
-    
-    return jsonify({
-        'total_products': total_products,
-        'active_products': active_products,
-        'featured_products': featured_products,
-        'total_categories': total_categories,
-        'unread_messages': unread_messages,
-        'total_messages': total_messages
-    })
-
+    return jsonify(read_stats())
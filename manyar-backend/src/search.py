@@ -0,0 +1,136 @@
+import re
+from src.models.user import db
+
+# Bilingual product search on an SQLite FTS5 table. The index holds a
+# normalized copy of each product's names and descriptions (rowid is the
+# product id) and is kept in sync by the product write routes, inside the
+# same transaction as the product change. Other databases have no index
+# and search with LIKE instead.
+
+# Harakat, superscript alef and tatweel
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+ARABIC_FOLDING = str.maketrans({
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0624': '\u0648',  # waw with hamza -> waw
+    '\u0626': '\u064a',  # yeh with hamza -> yeh
+    '\u0649': '\u064a',  # alef maksura -> yeh
+    '\u0629': '\u0647',  # ta marbuta -> heh
+})
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def normalize_text(text):
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS.sub('', text)
+    return text.translate(ARABIC_FOLDING).lower()
+
+def build_match_query(q):
+    # Every term must match; the last one also matches as a prefix so
+    # results show up while the user is still typing
+    terms = TOKEN_PATTERN.findall(normalize_text(q))
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def create_index(conn):
+    conn.exec_driver_sql(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5('
+        "name, description, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+def search_available():
+    return db.engine.dialect.name == 'sqlite'
+
+INSERT_DOCUMENT = 'INSERT INTO product_search (rowid, name, description) VALUES (:id, :name, :description)'
+
+def document(product_id, name_ar, name_en, description_ar, description_en):
+    return {
+        'id': product_id,
+        'name': normalize_text(f'{name_ar} {name_en}'),
+        'description': normalize_text(f'{description_ar or ""} {description_en or ""}')
+    }
+
+def index_product(product):
+    if not search_available():
+        return
+    db.session.execute(db.text('DELETE FROM product_search WHERE rowid = :id'), {'id': product.id})
+    db.session.execute(db.text(INSERT_DOCUMENT), document(
+        product.id, product.name_ar, product.name_en, product.description_ar, product.description_en
+    ))
+
+def index_documents(documents):
+    # Bulk variant for freshly inserted products (no existing rows to replace)
+    if documents and search_available():
+        db.session.execute(db.text(INSERT_DOCUMENT), documents)
+
+SEARCH_TABLE = db.table('product_search', db.column('rowid'))
+
+def remove_products(product_ids):
+    # A list of ids, or a SELECT of them for set-based deletes
+    if not search_available():
+        return
+    if isinstance(product_ids, (list, tuple, set)):
+        if not product_ids:
+            return
+        product_ids = list(product_ids)
+    db.session.execute(db.delete(SEARCH_TABLE).where(SEARCH_TABLE.c.rowid.in_(product_ids)))
+
+def rebuild_index(conn):
+    from src.models.product import Product
+
+    conn.exec_driver_sql('DELETE FROM product_search')
+    rows = conn.execute(db.select(
+        Product.id, Product.name_ar, Product.name_en, Product.description_ar, Product.description_en
+    )).all()
+    if rows:
+        conn.execute(db.text(INSERT_DOCUMENT), [document(*row) for row in rows])
+
+def _like_product_ids(q, page, per_page, is_active):
+    from src.models.product import Product
+
+    terms = TOKEN_PATTERN.findall(q.lower())
+    if not terms:
+        return [], 0
+
+    query = db.select(Product.id).filter(Product.is_active == is_active)
+    for term in terms:
+        pattern = f'%{term}%'
+        query = query.filter(db.or_(
+            Product.name_ar.ilike(pattern), Product.name_en.ilike(pattern),
+            Product.description_ar.ilike(pattern), Product.description_en.ilike(pattern)
+        ))
+    total = db.session.execute(db.select(db.func.count()).select_from(query.subquery())).scalar()
+    ids = db.session.execute(
+        query.order_by(Product.created_at.desc()).limit(per_page).offset((page - 1) * per_page)
+    ).scalars().all()
+    return ids, total
+
+def search_product_ids(q, page=1, per_page=20, is_active=True):
+    if not search_available():
+        return _like_product_ids(q, page, per_page, is_active)
+
+    match = build_match_query(q)
+    if match is None:
+        return [], 0
+
+    # CROSS JOIN pins the FTS table as the outer loop; otherwise SQLite may
+    # walk the product index and run the full-text match once per row.
+    # Names weigh ten times more than descriptions in the bm25 ranking.
+    params = {'match': match, 'is_active': is_active}
+    base = (
+        'FROM product_search CROSS JOIN product ON product.id = product_search.rowid '
+        'WHERE product_search MATCH :match AND product.is_active = :is_active'
+    )
+    total = db.session.execute(db.text(f'SELECT COUNT(*) {base}'), params).scalar()
+    ids = db.session.execute(
+        db.text(f'SELECT product.id {base} ORDER BY bm25(product_search, 10.0, 1.0) LIMIT :limit OFFSET :offset'),
+        {**params, 'limit': per_page, 'offset': (page - 1) * per_page}
+    ).scalars().all()
+    return ids, total
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from datetime import datetime
+from src.models.product import Category, Product, db
+from src.models.product_image import ProductImage
+
+# Batched serializers for the catalog read routes. Each function issues a
+# fixed number of queries no matter how many rows it is given, instead of
+# letting to_dict() lazy load images / categories once per row.
+
+def load_images(product_ids):
+    images_by_product = defaultdict(list)
+    if not product_ids:
+        return images_by_product
+
+    images = ProductImage.query.filter(
+        ProductImage.product_id.in_(product_ids)
+    ).order_by(ProductImage.product_id, ProductImage.sort_order).all()
+
+    for image in images:
+        images_by_product[image.product_id].append(image)
+    return images_by_product
+
+def count_products(category_ids):
+    if not category_ids:
+        return {}
+
+    rows = db.session.query(Product.category_id, db.func.count(Product.id)).filter(
+        Product.category_id.in_(category_ids)
+    ).group_by(Product.category_id).all()
+
+    return dict(rows)
+
+def serialize_categories(categories):
+    counts = count_products([category.id for category in categories])
+    return [category.to_dict(products_count=counts.get(category.id, 0)) for category in categories]
+
+def serialize_category(category):
+    return serialize_categories([category])[0]
+
+def serialize_products(products):
+    images_by_product = load_images([product.id for product in products])
+
+    category_ids = {product.category_id for product in products}
+    categories = Category.query.filter(Category.id.in_(category_ids)).all() if category_ids else []
+    categories_by_id = {category['id']: category for category in serialize_categories(categories)}
+
+    return [
+        product.to_dict(
+            images=images_by_product[product.id],
+            category=categories_by_id.get(product.category_id)
+        )
+        for product in products
+    ]
+
+def serialize_product(product):
+    return serialize_products([product])[0]
+
+# Sparse fieldsets / language projection for the product listings:
+#   ?fields=id,name,price,image_url   only these keys ('name' and
+#                                     'description' cover both languages)
+#   ?lang=ar|en                       drop the other language's fields
+#   ?include=category                 categories once in a side 'included'
+#                                     map instead of inline on every product
+# The selected fields also limit which columns are loaded and whether
+# images / categories are queried at all.
+
+PRODUCT_SCALAR_FIELDS = [
+    'id', 'name_ar', 'name_en', 'description_ar', 'description_en', 'price', 'original_price',
+    'is_featured', 'is_active', 'stock_quantity', 'phone_number', 'category_id',
+    'created_at', 'updated_at', 'discount_percentage'
+]
+PRODUCT_FIELDS = PRODUCT_SCALAR_FIELDS + ['image_url', 'images', 'category']
+FIELD_ALIASES = {
+    'name': ['name_ar', 'name_en'],
+    'description': ['description_ar', 'description_en'],
+}
+LANGUAGES = ('ar', 'en')
+
+def other_language(field, lang):
+    return any(field.endswith(f'_{other}') for other in LANGUAGES if other != lang)
+
+def parse_projection(args):
+    # Returns None when the request asks for the default, full representation
+    fields, lang = None, args.get('lang')
+    side_load = 'category' in (args.get('include') or '').split(',')
+
+    if lang and lang not in LANGUAGES:
+        raise ValueError('lang must be ar or en')
+
+    if args.get('fields'):
+        fields = {'id'}
+        for name in filter(None, (f.strip() for f in args['fields'].split(','))):
+            for field in FIELD_ALIASES.get(name, [name]):
+                if field not in PRODUCT_FIELDS:
+                    raise ValueError(f'Unknown field {name}')
+                fields.add(field)
+
+    if fields is None and not lang and not side_load:
+        return None
+    if fields is None:
+        fields = set(PRODUCT_FIELDS)
+    if lang:
+        fields = {field for field in fields if not other_language(field, lang)}
+    if side_load:
+        fields.discard('category')
+        fields.add('category_id')
+
+    return {'fields': fields, 'lang': lang, 'side_load': side_load}
+
+def projection_columns(projection):
+    fields = projection['fields']
+    columns = {field for field in fields if field in PRODUCT_SCALAR_FIELDS}
+    # Always needed for ordering / keyset cursors
+    columns |= {'id', 'created_at', 'price', 'discount_percentage'}
+    if 'image_url' in fields:
+        columns.add('image_url')
+    if 'category' in fields:
+        columns.add('category_id')
+    return [getattr(Product, column) for column in sorted(columns)]
+
+def apply_projection(query, projection):
+    if projection is None:
+        return query
+    return query.options(db.load_only(*projection_columns(projection)))
+
+def project_category(category, lang):
+    if not lang:
+        return category
+    return {key: value for key, value in category.items() if not other_language(key, lang)}
+
+def project_products(products, projection):
+    fields, lang = projection['fields'], projection['lang']
+
+    images_by_product = {}
+    if 'images' in fields or 'image_url' in fields:
+        images_by_product = load_images([product.id for product in products])
+
+    categories_by_id = {}
+    if 'category' in fields or projection['side_load']:
+        category_ids = {product.category_id for product in products}
+        categories = Category.query.filter(Category.id.in_(category_ids)).all() if category_ids else []
+        categories_by_id = {
+            category['id']: project_category(category, lang)
+            for category in serialize_categories(categories)
+        }
+
+    items = []
+    for product in products:
+        data = {}
+        for field in PRODUCT_SCALAR_FIELDS:
+            if field in fields:
+                value = getattr(product, field)
+                data[field] = value.isoformat() if isinstance(value, datetime) else value
+        if 'image_url' in fields:
+            data['image_url'] = product.primary_image_url(images_by_product[product.id])
+        if 'images' in fields:
+            data['images'] = [image.to_dict() for image in images_by_product[product.id]]
+        if 'category' in fields:
+            data['category'] = categories_by_id.get(product.category_id)
+        items.append(data)
+
+    included = None
+    if projection['side_load']:
+        included = {'categories': {str(category_id): category for category_id, category in categories_by_id.items()}}
+    return items, included
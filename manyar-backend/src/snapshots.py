@@ -0,0 +1,250 @@
+import json
+import logging
+import weakref
+from sqlalchemy import event
+from src.models.user import db
+from src.models.product import Category, Product
+from src.models.snapshot import ProductSnapshot
+from src.serializers import load_images, serialize_categories, serialize_products
+
+# Product snapshots: the public JSON of every product (its images included)
+# stored in product_snapshot, so the default representation in GET
+# /products/<id>, the listings and search is read as one text column per
+# product instead of hydrating products and images and calling to_dict().
+# The category is not part of a snapshot (its products_count changes with
+# every product added to it); it is serialized once per response and
+# stitched in.
+#
+# On SQLite, triggers on product and product_image clear the snapshot and
+# bump its version in the same transaction as every write, bulk updates and
+# cascaded deletes included, so a stored snapshot is never stale. Every
+# session commit then builds the cleared snapshots before the transaction
+# ends (build_pending(), a before_commit listener), so the write pays for
+# them and reads never write: a read that still finds one cleared (the row
+# was written outside the session) serializes that product live.
+# `flask rebuild-snapshots` builds them all, `flask check-snapshots`
+# compares them with the live rows. Other databases serialize the rows as
+# before.
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# All a listing needs from the product rows to filter, order and page
+KEY_COLUMNS = ['id', 'category_id', 'created_at', 'price', 'discount_percentage']
+
+def _stale(column):
+    return f'UPDATE product_snapshot SET version = version + 1, body = NULL WHERE product_id = {column};'
+
+TRIGGERS = {
+    'snapshot_product_insert': ('AFTER INSERT ON product', [
+        'INSERT OR IGNORE INTO product_snapshot (product_id, version) VALUES (NEW.id, 0);',
+    ]),
+    'snapshot_product_update': ('AFTER UPDATE ON product', [_stale('NEW.id')]),
+    'snapshot_image_insert': ('AFTER INSERT ON product_image', [_stale('NEW.product_id')]),
+    'snapshot_image_update': ('AFTER UPDATE ON product_image', [_stale('OLD.product_id'), _stale('NEW.product_id')]),
+    'snapshot_image_delete': ('AFTER DELETE ON product_image', [_stale('OLD.product_id')]),
+}
+
+# Only stores a snapshot built from the version that was read
+STORE = 'UPDATE product_snapshot SET body = :body WHERE product_id = :product_id AND version = :version'
+
+def create_triggers(conn):
+    # Tables rebuilt by later migrations lose their triggers; call this again
+    for name, (event, statements) in TRIGGERS.items():
+        conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+        conn.exec_driver_sql(f'CREATE TRIGGER {name} {event} BEGIN {" ".join(statements)} END')
+
+def backfill(conn):
+    # An empty snapshot for every product; the bodies are built by the next
+    # commit (flask migrate commits once it has upgraded)
+    conn.exec_driver_sql('INSERT OR IGNORE INTO product_snapshot (product_id, version) SELECT id, 0 FROM product')
+
+def snapshots_available():
+    return db.engine.dialect.name == 'sqlite'
+
+def dumps(data):
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def build_snapshots(products):
+    # {id: body} for fully loaded products
+    images_by_product = load_images([product.id for product in products])
+    return {
+        product.id: dumps(product.to_dict(images=images_by_product[product.id], include_category=False))
+        for product in products
+    }
+
+def _read_versions(product_ids):
+    return db.session.execute(
+        db.select(ProductSnapshot.product_id, ProductSnapshot.version, ProductSnapshot.body)
+        .filter(ProductSnapshot.product_id.in_(product_ids))
+    ).all()
+
+def store_snapshots(session, bodies, versions):
+    # In the session's transaction
+    if bodies:
+        session.execute(db.text(STORE), [
+            {'product_id': product_id, 'version': versions.get(product_id, 0), 'body': body}
+            for product_id, body in bodies.items()
+        ])
+
+def build_pending(session):
+    # Builds every cleared snapshot, in batches; the pending ones are found
+    # through ix_product_snapshot_pending
+    session.flush()
+    while True:
+        versions = dict(session.execute(
+            db.select(ProductSnapshot.product_id, ProductSnapshot.version)
+            .filter(ProductSnapshot.body.is_(None)).limit(BATCH_SIZE)
+        ).all())
+        if not versions:
+            return
+        product_ids = list(versions)
+        products = session.scalars(
+            db.select(Product).filter(Product.id.in_(product_ids)).execution_options(populate_existing=True)
+        ).all()
+        bodies = build_snapshots(products)
+        store_snapshots(session, bodies, versions)
+        orphans = [product_id for product_id in product_ids if product_id not in bodies]
+        if orphans:
+            # Left by a delete without foreign key enforcement
+            session.execute(db.delete(ProductSnapshot).filter(ProductSnapshot.product_id.in_(orphans)))
+
+_ready_engines = weakref.WeakSet()
+
+def _before_commit(session):
+    engine = session.get_bind()
+    if engine.dialect.name != 'sqlite':
+        return
+    if engine not in _ready_engines:
+        # Databases not migrated yet have no snapshots to keep
+        if not db.inspect(engine).has_table(ProductSnapshot.__tablename__):
+            return
+        _ready_engines.add(engine)
+    build_pending(session)
+
+def init_snapshots(engine):
+    if engine.dialect.name != 'sqlite':
+        return
+    if not event.contains(db.session, 'before_commit', _before_commit):
+        event.listen(db.session, 'before_commit', _before_commit)
+
+def read_snapshots(product_ids):
+    # {id: body}; products that no longer exist are left out. Read only:
+    # snapshots not built yet are serialized from the live rows
+    bodies = dict(db.session.execute(
+        db.select(ProductSnapshot.product_id, ProductSnapshot.body)
+        .filter(ProductSnapshot.product_id.in_(product_ids), ProductSnapshot.body.is_not(None))
+    ).all())
+    missing = [product_id for product_id in product_ids if product_id not in bodies]
+    if missing:
+        bodies.update(build_snapshots(Product.query.filter(Product.id.in_(missing)).all()))
+    return bodies
+
+def listing_query(query):
+    # Loads only the key columns; the rest comes from the snapshots
+    if not snapshots_available():
+        return query
+    return query.options(db.load_only(*(getattr(Product, column) for column in KEY_COLUMNS)))
+
+def categories_by_id(category_ids):
+    categories = Category.query.filter(Category.id.in_(category_ids)).all() if category_ids else []
+    return {category['id']: category for category in serialize_categories(categories)}
+
+def snapshot_products(products):
+    # Same result as serialize_products()
+    if not snapshots_available():
+        return serialize_products(products)
+
+    bodies = read_snapshots([product.id for product in products])
+    items = [json.loads(bodies[product.id]) for product in products if product.id in bodies]
+    categories = categories_by_id({item['category_id'] for item in items})
+    for item in items:
+        item['category'] = categories.get(item['category_id'])
+    return items
+
+def snapshot_product_json(product_id):
+    # JSON text of serialize_product(), stitched from the snapshot and the
+    # category without parsing either; None for an unknown product
+    category_id = db.session.scalar(db.select(Product.category_id).filter_by(id=product_id))
+    if category_id is None:
+        return None
+    body = read_snapshots([product_id]).get(product_id)
+    if body is None:
+        return None
+    category = categories_by_id([category_id]).get(category_id)
+    return f'{body[:-1]},"category":{dumps(category)}}}'
+
+def _batches():
+    last_id = 0
+    while True:
+        product_ids = db.session.scalars(
+            db.select(Product.id).filter(Product.id > last_id).order_by(Product.id).limit(BATCH_SIZE)
+        ).all()
+        if not product_ids:
+            return
+        yield product_ids
+        last_id = product_ids[-1]
+        db.session.expunge_all()
+
+def rebuild_snapshots():
+    # Builds every snapshot from the live rows; returns how many were built
+    stored = 0
+    for product_ids in _batches():
+        versions = {product_id: version for product_id, version, _ in _read_versions(product_ids)}
+        bodies = build_snapshots(Product.query.filter(Product.id.in_(product_ids)).all())
+        store_snapshots(db.session, bodies, versions)
+        db.session.commit()
+        stored += len(bodies)
+    return stored
+
+def check_snapshots(fix=False):
+    # Compares the stored snapshots with the live rows. Returns counts of
+    # products checked, snapshots that differ, products without a snapshot
+    # row and snapshot rows without a product. Snapshots cleared by a write
+    # and not read since are fine and not counted. fix=True rebuilds the
+    # differing and missing ones and deletes the orphans
+    result = {'checked': 0, 'stale': 0, 'missing': 0, 'orphaned': 0}
+    for product_ids in _batches():
+        rows = _read_versions(product_ids)
+        stored = {product_id: (version, body) for product_id, version, body in rows}
+        fresh = build_snapshots(Product.query.filter(Product.id.in_(product_ids)).all())
+
+        stale, missing = [], []
+        for product_id, body in fresh.items():
+            if product_id not in stored:
+                missing.append(product_id)
+            elif stored[product_id][1] is not None and stored[product_id][1] != body:
+                stale.append(product_id)
+
+        if stale:
+            # Written to while being compared: not a mismatch
+            current = {product_id: version for product_id, version, _ in _read_versions(stale)}
+            stale = [product_id for product_id in stale if current.get(product_id) == stored[product_id][0]]
+            for product_id in stale:
+                logger.warning('Product %s has a stale snapshot', product_id)
+
+        result['checked'] += len(fresh)
+        result['stale'] += len(stale)
+        result['missing'] += len(missing)
+        if fix and (stale or missing):
+            if missing:
+                db.session.execute(
+                    db.insert(ProductSnapshot).prefix_with('OR IGNORE'),
+                    [{'product_id': product_id, 'version': 0} for product_id in missing]
+                )
+            store_snapshots(
+                db.session,
+                {product_id: fresh[product_id] for product_id in stale + missing},
+                {product_id: version for product_id, (version, _) in stored.items()}
+            )
+            db.session.commit()
+
+    orphans = db.select(ProductSnapshot.product_id).filter(~ProductSnapshot.product_id.in_(db.select(Product.id)))
+    result['orphaned'] = db.session.scalar(db.select(db.func.count()).select_from(orphans.subquery()))
+    if fix and result['orphaned']:
+        db.session.execute(
+            db.delete(ProductSnapshot).filter(ProductSnapshot.product_id.in_(orphans)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+    return result
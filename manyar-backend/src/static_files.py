@@ -0,0 +1,112 @@
+import gzip
+import mimetypes
+import os
+import re
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # only gzip siblings are generated
+    brotli = None
+
+# Production serving of the built frontend in src/static. The folder is
+# indexed once at startup (no per-request filesystem checks), compressible
+# files get .gz / .br siblings written next to them by `flask build-static`,
+# and Vite's content-hashed bundles are served as immutable.
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SKIP_DIRS = {'uploads'}
+COMPRESSIBLE = {'.html', '.js', '.mjs', '.css', '.svg', '.json', '.map', '.txt', '.xml', '.ico'}
+MIN_COMPRESS_SIZE = 1024
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Vite names bundles like assets/index-DtOLu7sv.js
+HASHED_ASSET = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.\w+$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+def _compress(source_path, suffix, data):
+    target = source_path + suffix
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source_path):
+        return target
+
+    if suffix == '.gz':
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    else:
+        compressed = brotli.compress(data, quality=11)
+
+    if len(compressed) >= len(data):
+        return None
+    tmp_path = f'{target}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(compressed)
+    os.replace(tmp_path, target)
+    return target
+
+def _existing(path):
+    # Siblings written earlier, as long as they are not older than the source
+    encodings = {}
+    for encoding, suffix in ENCODINGS:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+            encodings[encoding] = target
+    return encodings
+
+def _precompress(path):
+    encodings = {}
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding, suffix in ENCODINGS:
+        if suffix == '.br' and brotli is None:
+            continue
+        target = _compress(path, suffix, data)
+        if target:
+            encodings[encoding] = target
+    return encodings
+
+def build_index(folder=STATIC_FOLDER, precompress=True):
+    index = {}
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if name.endswith(('.gz', '.br', '.tmp')):
+                continue
+
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, folder).replace(os.sep, '/')
+            stat = os.stat(path)
+            ext = os.path.splitext(name)[1].lower()
+            compressible = ext in COMPRESSIBLE and stat.st_size >= MIN_COMPRESS_SIZE
+
+            index[rel_path] = {
+                'path': path,
+                'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                'etag': f'{stat.st_mtime_ns:x}-{stat.st_size:x}',
+                'last_modified': stat.st_mtime,
+                'immutable': bool(HASHED_ASSET.match(rel_path)),
+                'compressible': compressible,
+                'encodings': (_precompress(path) if precompress else _existing(path)) if compressible else {}
+            }
+    return index
+
+def send_static(entry):
+    path, etag, encoding = entry['path'], entry['etag'], None
+    for candidate, _ in ENCODINGS:
+        if candidate in entry['encodings'] and request.accept_encodings[candidate]:
+            encoding = candidate
+            path = entry['encodings'][candidate]
+            etag = f'{etag}-{candidate}'
+            break
+
+    response = send_file(
+        path,
+        mimetype=entry['mimetype'],
+        etag=etag,
+        last_modified=entry['last_modified'],
+        conditional=True
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if entry['compressible']:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE if entry['immutable'] else 'no-cache'
+    return response
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.stats import StatCounter
+
+# Dashboard statistics. On SQLite the numbers live in the stat_counter
+# table and are kept current by triggers, so they change in the same
+# transaction as the product / category / contact write that caused them
+# and reading them is a single primary key range scan. Other databases
+# fall back to computing them with aggregate queries.
+#
+# Counter keys:
+#   categories.total, products.total, products.active, products.featured,
+#   messages.total, messages.unread,
+#   category:<id>.products      products per category
+#   messages.day:<YYYY-MM-DD>   messages received per day
+
+DAY_PREFIX = 'messages.day:'
+HISTORY_DAYS = 30
+
+def _bump(key, delta):
+    return (
+        f'INSERT INTO stat_counter (key, value) VALUES ({key}, {delta}) '
+        f'ON CONFLICT(key) DO UPDATE SET value = value + excluded.value;'
+    )
+
+def _category_key(column):
+    return f"'category:' || {column} || '.products'"
+
+def _day_key(column):
+    return f"'{DAY_PREFIX}' || date({column})"
+
+TRIGGERS = {
+    'stat_product_insert': ('AFTER INSERT ON product', [
+        _bump("'products.total'", 1),
+        _bump("'products.active'", 'COALESCE(NEW.is_active, 0)'),
+        _bump("'products.featured'", 'COALESCE(NEW.is_featured, 0)'),
+        _bump(_category_key('NEW.category_id'), 1),
+    ]),
+    'stat_product_delete': ('AFTER DELETE ON product', [
+        _bump("'products.total'", -1),
+        _bump("'products.active'", '-COALESCE(OLD.is_active, 0)'),
+        _bump("'products.featured'", '-COALESCE(OLD.is_featured, 0)'),
+        _bump(_category_key('OLD.category_id'), -1),
+    ]),
+    'stat_product_update': ('AFTER UPDATE OF is_active, is_featured, category_id ON product', [
+        _bump("'products.active'", 'COALESCE(NEW.is_active, 0) - COALESCE(OLD.is_active, 0)'),
+        _bump("'products.featured'", 'COALESCE(NEW.is_featured, 0) - COALESCE(OLD.is_featured, 0)'),
+        _bump(_category_key('OLD.category_id'), -1),
+        _bump(_category_key('NEW.category_id'), 1),
+    ]),
+    'stat_category_insert': ('AFTER INSERT ON category', [
+        _bump("'categories.total'", 1),
+    ]),
+    'stat_category_delete': ('AFTER DELETE ON category', [
+        _bump("'categories.total'", -1),
+        f"DELETE FROM stat_counter WHERE key = {_category_key('OLD.id')};",
+    ]),
+    'stat_message_insert': ('AFTER INSERT ON contact_message', [
+        _bump("'messages.total'", 1),
+        _bump("'messages.unread'", '1 - COALESCE(NEW.is_read, 0)'),
+        _bump(_day_key('NEW.created_at'), 1),
+    ]),
+    'stat_message_delete': ('AFTER DELETE ON contact_message', [
+        _bump("'messages.total'", -1),
+        _bump("'messages.unread'", 'COALESCE(OLD.is_read, 0) - 1'),
+        _bump(_day_key('OLD.created_at'), -1),
+    ]),
+    'stat_message_update': ('AFTER UPDATE OF is_read ON contact_message', [
+        _bump("'messages.unread'", 'COALESCE(OLD.is_read, 0) - COALESCE(NEW.is_read, 0)'),
+    ]),
+}
+
+def create_triggers(conn):
+    # Tables rebuilt by later migrations lose their triggers; call this again
+    for name, (event, statements) in TRIGGERS.items():
+        conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+        conn.exec_driver_sql(f'CREATE TRIGGER {name} {event} BEGIN {" ".join(statements)} END')
+
+def rebuild_counters(conn):
+    conn.exec_driver_sql('DELETE FROM stat_counter')
+    conn.exec_driver_sql(
+        'INSERT INTO stat_counter (key, value) '
+        "SELECT 'categories.total', COUNT(*) FROM category "
+        "UNION ALL SELECT 'products.total', COUNT(*) FROM product "
+        "UNION ALL SELECT 'products.active', COUNT(*) FROM product WHERE is_active = 1 "
+        "UNION ALL SELECT 'products.featured', COUNT(*) FROM product WHERE is_featured = 1 "
+        "UNION ALL SELECT 'messages.total', COUNT(*) FROM contact_message "
+        "UNION ALL SELECT 'messages.unread', COUNT(*) FROM contact_message WHERE NOT COALESCE(is_read, 0) "
+        f"UNION ALL SELECT {_category_key('category_id')}, COUNT(*) FROM product GROUP BY category_id "
+        f"UNION ALL SELECT {_day_key('created_at')}, COUNT(*) FROM contact_message "
+        'WHERE created_at IS NOT NULL GROUP BY date(created_at)'
+    )
+
+def counters_available():
+    return db.engine.dialect.name == 'sqlite'
+
+def _read_counters(since):
+    # Everything except the per-day keys sorts outside the day range, so one
+    # range condition skips the days older than the history window
+    rows = db.session.execute(
+        db.select(StatCounter.key, StatCounter.value).filter(db.or_(
+            StatCounter.key < DAY_PREFIX,
+            StatCounter.key >= f'{DAY_PREFIX}{since.isoformat()}'
+        ))
+    ).all()
+
+    counters, per_category, per_day = {}, {}, {}
+    for key, value in rows:
+        if key.startswith('category:'):
+            per_category[int(key[len('category:'):-len('.products')])] = value
+        elif key.startswith(DAY_PREFIX):
+            per_day[key[len(DAY_PREFIX):]] = value
+        else:
+            counters[key] = value
+    return counters, per_category, per_day
+
+def _aggregate_counters(since):
+    from src.models.product import Category, Product, ContactMessage
+
+    row = db.session.execute(db.select(
+        db.select(db.func.count()).select_from(Category).scalar_subquery(),
+        db.select(db.func.count()).select_from(Product).scalar_subquery(),
+        db.select(db.func.count()).select_from(Product).filter_by(is_active=True).scalar_subquery(),
+        db.select(db.func.count()).select_from(Product).filter_by(is_featured=True).scalar_subquery(),
+        db.select(db.func.count()).select_from(ContactMessage).scalar_subquery(),
+        db.select(db.func.count()).select_from(ContactMessage).filter_by(is_read=False).scalar_subquery(),
+    )).one()
+    counters = dict(zip(
+        ['categories.total', 'products.total', 'products.active', 'products.featured', 'messages.total', 'messages.unread'],
+        row
+    ))
+
+    per_category = dict(db.session.execute(
+        db.select(Product.category_id, db.func.count()).group_by(Product.category_id)
+    ).all())
+
+    day = db.func.date(ContactMessage.created_at)
+    per_day = {
+        str(key): value for key, value in db.session.execute(
+            db.select(day, db.func.count())
+            .filter(ContactMessage.created_at >= datetime.combine(since, datetime.min.time()))
+            .group_by(day)
+        ).all()
+    }
+    return counters, per_category, per_day
+
+def read_stats():
+    today = datetime.utcnow().date()
+    since = today - timedelta(days=HISTORY_DAYS - 1)
+
+    if counters_available():
+        counters, per_category, per_day = _read_counters(since)
+    else:
+        counters, per_category, per_day = _aggregate_counters(since)
+
+    days = [since + timedelta(days=i) for i in range(HISTORY_DAYS)]
+
+    return {
+        'total_products': counters.get('products.total', 0),
+        'active_products': counters.get('products.active', 0),
+        'featured_products': counters.get('products.featured', 0),
+        'total_categories': counters.get('categories.total', 0),
+        'unread_messages': counters.get('messages.unread', 0),
+        'total_messages': counters.get('messages.total', 0),
+        'products_per_category': [
+            {'category_id': category_id, 'products_count': count}
+            for category_id, count in sorted(per_category.items()) if count
+        ],
+        'messages_per_day': [
+            {'date': day.isoformat(), 'count': per_day.get(day.isoformat(), 0)}
+            for day in days
+        ]
+    }
@@ -0,0 +1,87 @@
+import os
+import sys
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    # The app reads its configuration when src.main is imported, so the
+    # environment is set first and the app imported here, never at the top
+    # of a test module
+    state = tmp_path_factory.mktemp('state')
+    os.environ.update({
+        'DATABASE_URL': f'sqlite:///{state}/manyar.db',
+        'RATE_LIMIT_DB': str(state / 'ratelimit.db'),
+        'CONTACT_QUEUE_DB': str(state / 'contact_queue.db'),
+        'EVENTS_DB': str(state / 'events.db'),
+        'RATE_LIMIT_ENABLED': '0',
+        # Pool exhaustion fails a test in seconds rather than half a minute
+        'DB_POOL_TIMEOUT': '5',
+    })
+    os.environ.pop('METRICS_DIR', None)
+
+    from src.main import app
+    from src.commands import init_database
+    from benchmarks.generate import generate
+
+    with app.app_context():
+        init_database()
+        # 10 categories, 1000 products with their images, 200 messages
+        generate('1k', quiet=True)
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_client(app):
+    from benchmarks.common import ADMIN_PASSWORD, ADMIN_USERNAME
+
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+    assert response.status_code == 200
+    return client
+
+@pytest.fixture
+def record_statements(app):
+    # with record_statements() as statements: collects the (statement,
+    # parameters) pairs the engine runs inside the block; record_statements(
+    # other_app) watches the engine of another app
+    from src.models.user import db
+
+    @contextmanager
+    def record(target=None):
+        with (target or app).app_context():
+            engine = db.engine
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return record
+
+@pytest.fixture
+def get_uncached(client, record_statements):
+    # GET that misses the response cache; returns the response and the
+    # statements it ran
+    from src.cache import catalog_cache
+
+    def get(url):
+        catalog_cache.invalidate()
+        with record_statements() as statements:
+            response = client.get(url)
+        assert response.status_code == 200
+        return response, statements
+
+    return get
@@ -0,0 +1,33 @@
+import json
+import pytest
+
+def jsonl_line(name):
+    return json.dumps({'name_ar': name, 'name_en': name, 'category_id': 1, 'price': 10}).encode() + b'\n'
+
+def csv_line(name):
+    return f'{name},{name},1,10\r\n'.encode()
+
+def imported_names(app, prefix):
+    from src.models.product import Product, db
+
+    with app.app_context():
+        return db.session.scalars(db.select(Product.name_en).filter(Product.name_en.like(f'{prefix}%'))).all()
+
+@pytest.mark.parametrize('fmt, header, line', [
+    ('jsonl', b'', jsonl_line),
+    ('csv', b'name_ar,name_en,category_id,price\r\n', csv_line),
+])
+def test_rows_before_unreadable_input_are_imported(app, admin_client, fmt, header, line):
+    prefix = f'Import {fmt} '
+    body = header + b''.join(line(f'{prefix}{i}') for i in range(5)) + b'\xff\xfe not utf-8\n' + line(f'{prefix}after')
+    first_line = 1 + (1 if header else 0)
+
+    response = admin_client.post(f'/api/admin/catalog/import?format={fmt}', data=body, content_type='text/plain')
+
+    assert response.status_code == 200
+    assert response.json['imported'] == 5
+    assert response.json['failed'] == 1
+    [error] = response.json['errors']
+    assert error['line'] == first_line + 5
+    assert error['error'].startswith('Unreadable input')
+    assert sorted(imported_names(app, prefix)) == [f'{prefix}{i}' for i in range(5)]
@@ -0,0 +1,49 @@
+import threading
+
+THREADS = 8
+PER_THREAD = 50
+
+def test_concurrent_submissions_are_written_exactly_once(app, tmp_path):
+    from src.contact_queue import ContactQueue
+    from src.models.product import ContactMessage, db
+
+    queue = ContactQueue(str(tmp_path / 'contact_queue.db'), flush_interval=0.01, dedupe_seconds=600)
+    queue.start(app)
+    errors = []
+
+    def submit(thread):
+        try:
+            for i in range(PER_THREAD):
+                assert queue.enqueue(f'Sender {thread}', f'queue-{thread}-{i}@example.com', f'Message {i}')
+        except Exception as e:
+            errors.append(e)
+
+    def flush_while_submitting(done):
+        # A second flusher, as in another worker process
+        try:
+            with app.app_context():
+                while not done.is_set():
+                    queue.flush()
+        except Exception as e:
+            errors.append(e)
+
+    done = threading.Event()
+    flusher = threading.Thread(target=flush_while_submitting, args=(done,))
+    flusher.start()
+    submitters = [threading.Thread(target=submit, args=(thread,)) for thread in range(THREADS)]
+    for submitter in submitters:
+        submitter.start()
+    for submitter in submitters:
+        submitter.join()
+    done.set()
+    flusher.join()
+    queue.stop()
+
+    assert errors == []
+    assert queue.pending() == 0
+    with app.app_context():
+        emails = db.session.scalars(
+            db.select(ContactMessage.email).filter(ContactMessage.email.like('queue-%@example.com'))
+        ).all()
+    assert len(emails) == THREADS * PER_THREAD
+    assert len(set(emails)) == len(emails)
@@ -0,0 +1,61 @@
+import threading
+
+READERS = 6
+WRITERS = 4
+REQUESTS = 15
+
+def test_sqlite_connections_use_wal_and_busy_timeout(app):
+    from src.models.user import db
+
+    with app.app_context(), db.engine.connect() as conn:
+        assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == app.config['SQLITE_PRAGMAS']['busy_timeout']
+        assert conn.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+
+def test_parallel_readers_and_writers(app, admin_client):
+    from benchmarks.common import ADMIN_PASSWORD, ADMIN_USERNAME
+    from src.models.product import Category, Product, db
+
+    assert not app.config['SQLALCHEMY_DATABASE_URI'].endswith(':memory:')
+    failures = []
+
+    def read(_):
+        client = app.test_client()
+        for i in range(REQUESTS):
+            for url in (f'/api/products?page={i % 5 + 1}', '/api/categories'):
+                response = client.get(url)
+                if response.status_code != 200:
+                    failures.append((url, response.status_code, response.get_data(as_text=True)))
+
+    def write(writer):
+        client = app.test_client()
+        client.post('/api/auth/login', json={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+        for i in range(REQUESTS):
+            name = f'Concurrent {writer}-{i}'
+            for url, data in (
+                ('/api/products', {'name_ar': name, 'name_en': name, 'category_id': 1, 'price': 5}),
+                ('/api/categories', {'name_ar': name, 'name_en': name}),
+            ):
+                response = client.post(url, json=data)
+                if response.status_code != 201:
+                    failures.append((url, response.status_code, response.get_data(as_text=True)))
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(READERS)]
+    threads += [threading.Thread(target=write, args=(i,)) for i in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not [failure for failure in failures if 'database is locked' in failure[2]]
+    assert failures == []
+    with app.app_context():
+        concurrent = Product.name_en.like('Concurrent %')
+        assert db.session.scalar(db.select(db.func.count()).filter(concurrent)) == WRITERS * REQUESTS
+        categories = Category.name_en.like('Concurrent %')
+        assert db.session.scalar(db.select(db.func.count()).filter(categories)) == WRITERS * REQUESTS
+
+        # The other tests expect the seeded catalog
+        db.session.execute(db.delete(Product).filter(concurrent))
+        db.session.execute(db.delete(Category).filter(categories))
+        db.session.commit()
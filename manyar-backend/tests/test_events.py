@@ -0,0 +1,30 @@
+def test_open_streams_do_not_hold_database_connections(app, admin_client, monkeypatch):
+    from src.database import _env_int
+    from src.events import publish
+    from src.models.user import db
+
+    monkeypatch.setenv('EVENTS_THREADED', '1')
+    with app.app_context():
+        pool = db.engine.pool
+    # More streams than the pool has connections
+    count = _env_int('DB_POOL_SIZE', 5) + _env_int('DB_MAX_OVERFLOW', 10) + 5
+
+    streams = []
+    try:
+        for _ in range(count):
+            response = admin_client.get('/api/admin/events', buffered=False)
+            assert response.status_code == 200
+            assert next(response.response).startswith(b'retry:')
+            streams.append(response)
+
+        # Every stream reads the stats once it sees the event
+        with app.app_context():
+            publish('catalog', {})
+        for response in streams:
+            assert b'event: catalog' in next(response.response)
+
+        assert pool.checkedout() == 0
+        assert admin_client.get('/api/stats').status_code == 200
+    finally:
+        for response in streams:
+            response.close()
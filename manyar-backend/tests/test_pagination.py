@@ -0,0 +1,25 @@
+import pytest
+
+@pytest.mark.parametrize('per_page, expected', [(0, 1), (-1, 1), (-50, 1), (1000, 100)])
+def test_product_cursor_pages_keep_per_page_in_bounds(client, per_page, expected):
+    response = client.get(f'/api/products?cursor=&per_page={per_page}')
+
+    assert response.status_code == 200
+    assert response.json['per_page'] == expected
+    assert len(response.json['products']) == expected
+    assert response.json['has_next']
+
+@pytest.mark.parametrize('per_page, expected', [(0, 1), (-1, 1), (1000, 100)])
+def test_contact_cursor_pages_keep_per_page_in_bounds(admin_client, per_page, expected):
+    response = admin_client.get(f'/api/contact?cursor=&per_page={per_page}')
+
+    assert response.status_code == 200
+    assert response.json['per_page'] == expected
+    assert len(response.json['messages']) == expected
+    assert response.json['has_next']
+
+def test_cursor_pages_follow_on(client):
+    first = client.get('/api/products?cursor=&per_page=0').json
+    second = client.get(f'/api/products?cursor={first["next_cursor"]}&per_page=0').json
+
+    assert [product['id'] for product in second['products']] != [product['id'] for product in first['products']]
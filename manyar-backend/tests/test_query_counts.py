@@ -0,0 +1,79 @@
+import pytest
+
+CATALOG_SIZES = (5, 50)
+CATEGORIES = 4
+
+@pytest.mark.parametrize('query', ['', '&category_id=1', '&sort=price', '&is_featured=true'])
+def test_product_listing_statements_do_not_grow_with_page_size(get_uncached, query):
+    get_uncached(f'/api/products?per_page=5{query}')
+
+    small, small_statements = get_uncached(f'/api/products?per_page=5{query}')
+    large, large_statements = get_uncached(f'/api/products?per_page=50{query}')
+
+    assert len(large.json['products']) > len(small.json['products'])
+    assert len(large_statements) == len(small_statements)
+    assert len(large_statements) <= 5
+
+def test_categories_take_a_fixed_number_of_statements(get_uncached):
+    get_uncached('/api/categories')
+
+    response, statements = get_uncached('/api/categories')
+
+    assert len(response.json) == 10
+    assert len(statements) <= 2
+
+@pytest.fixture(scope='module')
+def catalogs(app, tmp_path_factory):
+    # {size: app} on databases of their own, each with `size` products
+    # spread over CATEGORIES categories, two images per product
+    from benchmarks.generate import ensure_admin
+    from src.commands import init_database
+    from src.main import create_app
+
+    apps = {}
+    for size in CATALOG_SIZES:
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setenv('DATABASE_URL', f'sqlite:///{tmp_path_factory.mktemp(f"catalog{size}")}/manyar.db')
+            apps[size] = create_app()
+        with apps[size].app_context():
+            init_database()
+            ensure_admin()
+
+        client = apps[size].test_client()
+        for i in range(size):
+            response = client.post('/api/products', json={
+                'name_ar': f'مصباح {i}',
+                'name_en': f'Lamp {i}',
+                'price': 10 + i,
+                'category_id': i % CATEGORIES + 1,
+                'images': [{'image_url': f'/uploads/lamp-{i}-{n}.jpg'} for n in range(2)],
+            })
+            assert response.status_code == 201
+    return apps
+
+@pytest.mark.parametrize('url', [
+    '/api/products?per_page=100',
+    '/api/products?per_page=100&cursor=',
+    '/api/products?per_page=100&category_id=2',
+    '/api/products/search?q=lamp&per_page=100',
+    '/api/products/3',
+    '/api/categories',
+    '/api/categories/2',
+])
+def test_statements_do_not_grow_with_the_catalog(catalogs, record_statements, url):
+    from src.cache import catalog_cache
+
+    counts, bodies = {}, {}
+    for size, sized_app in catalogs.items():
+        client = sized_app.test_client()
+        client.get(url)
+        catalog_cache.invalidate()
+        with record_statements(sized_app) as statements:
+            response = client.get(url)
+        assert response.status_code == 200
+        counts[size], bodies[size] = len(statements), response.get_data()
+
+    assert counts[CATALOG_SIZES[0]] == counts[CATALOG_SIZES[-1]]
+    if url != '/api/products/3':
+        # The larger catalog really returned more
+        assert len(bodies[CATALOG_SIZES[-1]]) > len(bodies[CATALOG_SIZES[0]])
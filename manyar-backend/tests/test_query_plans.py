@@ -0,0 +1,80 @@
+import pytest
+
+def query_plan(app, statement, parameters):
+    from src.models.user import db
+
+    with app.app_context(), db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    return ' | '.join(row[-1] for row in rows)
+
+def page_and_count(statements):
+    # The page of products and the total count of a listing request
+    page = [pair for pair in statements if pair[0].lstrip().startswith('SELECT product.') and 'LIMIT' in pair[0]]
+    count = [pair for pair in statements if pair[0].lstrip().startswith('SELECT count(*)')]
+    assert len(page) == 1 and len(count) == 1
+    return page[0], count[0]
+
+@pytest.mark.parametrize('query, index', [
+    ('', 'ix_product_active_created'),
+    ('is_featured=true', 'ix_product_active_featured_created'),
+    ('sort=price', 'ix_product_active_price'),
+    ('sort=discount', 'ix_product_active_discount'),
+])
+def test_filtered_listing_uses_an_index(app, get_uncached, query, index):
+    _, statements = get_uncached(f'/api/products?{query}')
+
+    page, count = page_and_count(statements)
+
+    assert f'USING INDEX {index} ' in query_plan(app, *page)
+    assert 'SCAN product' not in query_plan(app, *count)
+
+@pytest.mark.parametrize('query, index', [
+    ('', 'ix_product_active_category_created'),
+    ('&sort=price', 'ix_product_active_category_price'),
+    ('&sort=discount', 'ix_product_active_category_discount'),
+])
+def test_category_listing_uses_an_index(app, get_uncached, query, index):
+    _, statements = get_uncached(f'/api/products?category_id=3{query}')
+
+    page, count = page_and_count(statements)
+
+    assert f'USING INDEX {index} ' in query_plan(app, *page)
+    assert 'SCAN product' not in query_plan(app, *count)
+
+def test_image_loading_uses_an_index(app, record_statements):
+    from src.serializers import load_images
+
+    with app.app_context(), record_statements() as statements:
+        images = load_images([1, 2, 3])
+
+    assert images
+    assert len(statements) == 1
+    assert 'USING INDEX ix_product_image_product_sort ' in query_plan(app, *statements[0])
+
+def contact_page(statements):
+    page = [pair for pair in statements if pair[0].lstrip().startswith('SELECT contact_message.') and 'LIMIT' in pair[0]]
+    assert len(page) == 1
+    return page[0]
+
+@pytest.mark.parametrize('params, index', [
+    ({}, 'ix_contact_message_created'),
+    ({'is_read': 'true'}, 'ix_contact_message_read_created'),
+    ({'cursor': ''}, 'ix_contact_message_created'),
+    ({'cursor': '', 'is_read': 'true'}, 'ix_contact_message_read_created'),
+])
+def test_contact_listing_uses_an_index_for_its_order(app, admin_client, record_statements, params, index):
+    with record_statements() as statements:
+        response = admin_client.get('/api/contact', query_string=params)
+    assert response.status_code == 200
+    pages = [contact_page(statements)]
+
+    if 'cursor' in params:
+        # Later pages add the cursor condition
+        with record_statements() as statements:
+            admin_client.get('/api/contact', query_string={**params, 'cursor': response.json['next_cursor']})
+        pages.append(contact_page(statements))
+
+    for page in pages:
+        plan = query_plan(app, *page)
+        assert f'USING INDEX {index}' in plan
+        assert 'USE TEMP B-TREE FOR ORDER BY' not in plan
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Generous for slow CI machines; it takes well under a second
+IMPORT_BUDGET_SECONDS = 3.0
+
+IMPORT_APP = '''
+import json, time
+started = time.perf_counter()
+import src.main
+print(json.dumps({'seconds': time.perf_counter() - started}))
+'''
+
+def _files(folder):
+    found = set()
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [name for name in dirs if name not in ('venv', 'node_modules', '__pycache__', '.pytest_cache')]
+        found.update(os.path.join(root, name) for name in dirs + files)
+    return found
+
+def test_importing_the_app_is_fast_and_writes_nothing(tmp_path):
+    state = tmp_path / 'state'
+    env = dict(
+        os.environ,
+        PYTHONDONTWRITEBYTECODE='1',
+        # The default: a file in the instance folder, which must not be created
+        DATABASE_URL='sqlite:///manyar.db',
+        METRICS_DIR=str(state / 'metrics'),
+        RATE_LIMIT_DB=str(state / 'ratelimit.db'),
+        CONTACT_QUEUE_DB=str(state / 'contact_queue.db'),
+        EVENTS_DB=str(state / 'events.db'),
+    )
+    before = _files(BACKEND)
+
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_APP], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60
+    )
+
+    assert result.returncode == 0, result.stderr
+    seconds = json.loads(result.stdout.strip().splitlines()[-1])['seconds']
+    assert seconds < IMPORT_BUDGET_SECONDS
+    assert not state.exists()
+    assert _files(BACKEND) - before == set()
@@ -50,7 +50,45 @@ function AdminPanel() {
     if (isLoggedIn) {
       loadData()
     }
-  }, [isLoggedIn, activeTab])
+  }, [isLoggedIn])
+
+  // Live updates pushed by the server: new messages, stats and catalog edits.
+  // EventSource reconnects by itself and resumes after the last event it got
+  useEffect(() => {
+    if (!isLoggedIn) return
+
+    const events = new EventSource(`${API_BASE}/admin/events`, { withCredentials: true })
+    let catalogTimer = null
+
+    events.addEventListener('stats', (event) => {
+      // Only the numbers that changed, apart from the first one
+      const changed = JSON.parse(event.data)
+      setStats((current) => ({ ...current, ...changed }))
+    })
+    events.addEventListener('contact', (event) => {
+      const message = JSON.parse(event.data)
+      setMessages((current) => [message, ...current.filter((m) => m.id !== message.id)])
+    })
+    events.addEventListener('contact_update', (event) => {
+      const { ids, is_read } = JSON.parse(event.data)
+      setMessages((current) => current.map((m) => (ids.includes(m.id) ? { ...m, is_read } : m)))
+    })
+    events.addEventListener('contact_delete', (event) => {
+      const { ids } = JSON.parse(event.data)
+      setMessages((current) => current.filter((m) => !ids.includes(m.id)))
+    })
+    events.addEventListener('catalog', () => {
+      // Imports and bulk edits send these in bursts
+      clearTimeout(catalogTimer)
+      catalogTimer = setTimeout(() => loadSections('categories,products'), 500)
+    })
+    events.addEventListener('reset', () => loadData())
+
+    return () => {
+      clearTimeout(catalogTimer)
+      events.close()
+    }
+  }, [isLoggedIn])
 
   const logout = async () => {
     try {
@@ -69,35 +107,17 @@ function AdminPanel() {
   const loadData = async () => {
     try {
       setLoading(true)
-      switch (activeTab) {
-        case 'dashboard':
-          const statsRes = await fetch(`${API_BASE}/stats`)
-          if (statsRes.ok) setStats(await statsRes.json())
-          break
-        case 'categories':
-          const categoriesRes = await fetch(`${API_BASE}/categories`)
-          if (categoriesRes.ok) setCategories(await categoriesRes.json())
-          break
-        case 'products':
-          const productsRes = await fetch(`${API_BASE}/products`)
-          if (productsRes.ok) {
-            const data = await productsRes.json()
-            setProducts(data.products || [])
-          }
-          break
-        case 'messages':
-          const messagesRes = await fetch(`${API_BASE}/contact`)
-          if (messagesRes.ok) {
-            const data = await messagesRes.json()
-            setMessages(data.messages || [])
-          }
-          break
-        case 'admins':
-          const adminsRes = await fetch(`${API_BASE}/admin/admins`, {
-            credentials: 'include'
-          })
-          if (adminsRes.ok) setAdmins(await adminsRes.json())
-          break
+      // One request for every tab: stats, categories, products, messages and admins
+      const dashboardRes = await fetch(`${API_BASE}/admin/dashboard`, {
+        credentials: 'include'
+      })
+      if (dashboardRes.ok) {
+        const data = await dashboardRes.json()
+        setStats(data.stats || {})
+        setCategories(data.categories || [])
+        setProducts(data.products?.products || [])
+        setMessages(data.messages?.messages || [])
+        setAdmins(data.admins || [])
       }
     } catch (error) {
       console.error('Failed to load data:', error)
@@ -106,6 +126,21 @@ function AdminPanel() {
     }
   }
 
+  const loadSections = async (sections) => {
+    try {
+      const dashboardRes = await fetch(`${API_BASE}/admin/dashboard?sections=${sections}`, {
+        credentials: 'include'
+      })
+      if (dashboardRes.ok) {
+        const data = await dashboardRes.json()
+        if (data.categories) setCategories(data.categories)
+        if (data.products) setProducts(data.products.products || [])
+      }
+    } catch (error) {
+      console.error('Failed to refresh data:', error)
+    }
+  }
+
   const saveCategory = async (categoryData) => {
     try {
       const url = editingCategory
@@ -34,21 +34,12 @@ function ServicePages({ categoryId, language, onBack }) {
     try {
       setLoading(true)
       
-      // Load categories first
-      const categoriesResponse = await fetch(`${API_BASE}/categories`)
-      if (categoriesResponse.ok) {
-        const categories = await categoriesResponse.json()
-        const currentCategory = categories.find(cat => cat.id === categoryId)
-        setCategory(currentCategory)
-        
-        // Load products for this category
-        if (currentCategory) {
-          const productsResponse = await fetch(`${API_BASE}/products?category_id=${currentCategory.id}&is_active=true`)
-          if (productsResponse.ok) {
-            const productsData = await productsResponse.json()
-            setProducts(productsData.products || [])
-          }
-        }
+      // The category and its active products in one request
+      const response = await fetch(`${API_BASE}/storefront/${categoryId}`)
+      if (response.ok) {
+        const data = await response.json()
+        setCategory(data.category)
+        setProducts(data.products || [])
       }
     } catch (error) {
       console.error('Failed to load service data:', error)